@@ -0,0 +1,234 @@
+import argparse
+import ast
+import concurrent.futures
+import hashlib
+import json
+import os
+import pathlib
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import tokenize
+
+
+# Regenerates the images of the site from the scripts in zima/ before "mkdocs build".
+#   - a script is a figure producer when its code (not its comments) names a .png file that is also in docs/,
+#   - its hash covers its source, the sources of the local modules it imports, the input data it names
+#     (korelace.txt, novy_nakup.csv, weather_data.csv, ...; in the imported modules only outside their main())
+#     and its command line arguments,
+#   - only scripts whose hash changed, or whose images in docs/ were changed or removed, run again,
+#     every one in its own process in a temporary directory, and the images are copied to docs/.
+# The hashes are kept in .figure_cache.json next to this file.
+
+PAGE = pathlib.Path(__file__).resolve().parent
+ZIMA = PAGE.parent / 'zima'
+DOCS = PAGE / 'docs'
+CACHE = PAGE / '.figure_cache.json'
+
+# images that several scripts can produce, the docs use the one given here
+PRODUCERS = {
+    'dvere.png': 'problem tri dveri/dvere_finished.py',
+    'fft_temperature.png': 'python_tutorial/temperature.py',
+}
+# command line arguments of the scripts, they are part of the hash
+ARGUMENTS = {}
+DATA_SUFFIXES = ('.csv', '.txt', '.dat')
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Regenerate the figures of the site from the scripts in zima/")
+    parser.add_argument("--jobs", type = int, default = os.cpu_count(), help = "number of scripts run at once")
+    parser.add_argument("--force", action = "store_true", help = "run every script, ignore the cache")
+    parser.add_argument("--dry-run", action = "store_true", help = "only list the scripts that would run")
+    parser.add_argument("--build", action = "store_true", help = "run mkdocs build afterwards")
+    args = parser.parse_args()
+
+    cache = json.loads(CACHE.read_text()) if CACHE.exists() else {}
+    jobs = []
+    for script, targets in find_figure_scripts().items():
+        name = script.relative_to(ZIMA).as_posix()
+        sources = local_sources(script)
+        inputs = input_files(script, sources)
+        missing = [i.name for i in inputs if not i.exists()]
+        if missing:
+            print(f"skip    {name}: missing input {', '.join(missing)}")
+            continue
+
+        digest = script_hash(script, sources, inputs)
+        if not args.force and is_up_to_date(cache.get(name), digest, targets):
+            print(f"cached  {name}")
+            continue
+        jobs.append((name, script, digest, targets, inputs))
+
+    if args.dry_run:
+        for name, *rest in jobs:
+            print(f"stale   {name}")
+        return
+
+    failed = False
+    with concurrent.futures.ThreadPoolExecutor(max_workers = args.jobs) as pool: # the scripts themselves run as separate processes
+        futures = {pool.submit(run_script, script, targets, inputs, ARGUMENTS.get(name, [])): (name, digest) for name, script, digest, targets, inputs in jobs}
+        for future in concurrent.futures.as_completed(futures):
+            name, digest = futures[future]
+            ok, log, images = future.result()
+            if ok:
+                cache[name] = {'hash': digest, 'images': images}
+                print(f"built   {name}: {', '.join(sorted(images))}")
+            else:
+                failed = True
+                cache.pop(name, None)
+                print(f"FAILED  {name}\n{log}")
+
+    CACHE.write_text(json.dumps(cache, indent = 1, sort_keys = True))
+
+    if failed:
+        sys.exit(1)
+    if args.build:
+        subprocess.run(['mkdocs', 'build'], cwd = PAGE, check = True)
+
+
+def code_strings(path):
+    # string literals in the code, strings in comments do not count
+    with open(path, 'rb') as f:
+        tokens = tokenize.tokenize(f.readline)
+        for t in tokens:
+            if t.type == tokenize.STRING:
+                try:
+                    value = ast.literal_eval(t.string)
+                except (ValueError, SyntaxError): # f-strings are not literals
+                    continue
+                if isinstance(value, str):
+                    yield value
+
+
+def find_figure_scripts():
+    # {script: {image name: [paths in docs/]}} for every image of the docs that a script in zima/ produces
+    images = set(DOCS.rglob('*.png'))
+    for md in DOCS.rglob('*.md'): # images linked from the pages count even when the file was deleted
+        images |= {(md.parent / link).resolve() for link in re.findall(r'\]\(([^()\s]+\.png)\)', md.read_text())}
+    in_docs = {}
+    for image in sorted(images):
+        in_docs.setdefault(image.name, []).append(image)
+
+    producers = {}
+    for script in sorted(ZIMA.rglob('*.py')):
+        if 'szd' in script.relative_to(ZIMA).parts or '__main__' not in script.read_text():
+            continue
+        for s in code_strings(script):
+            if s.endswith('.png') and s in in_docs:
+                producers.setdefault(s, []).append(script)
+
+    scripts = {}
+    for image, candidates in producers.items():
+        script = choose_producer(image, candidates, in_docs[image])
+        if script:
+            scripts.setdefault(script, {})[image] = [str(p) for p in in_docs[image]]
+    return scripts
+
+
+def choose_producer(image, candidates, destinations):
+    if image in PRODUCERS:
+        return ZIMA / PRODUCERS[image]
+    if len(candidates) == 1:
+        return candidates[0]
+
+    # several scripts make the same image, take the one whose code the page next to the image shows
+    shown = set()
+    for page in {d.parent for d in destinations}:
+        for md in page.glob('*.md'):
+            shown |= {ZIMA / s for s in re.findall(r'--8<--\s+"([^":]+)', md.read_text())}
+    chosen = [c for c in candidates if c in shown]
+    if len(chosen) == 1:
+        return chosen[0]
+    print(f"skip    {image}: made by {', '.join(c.relative_to(ZIMA).as_posix() for c in candidates)}, add it to PRODUCERS")
+    return None
+
+
+def local_sources(script):
+    # the script and every module from zima/ it imports, directly or through other modules
+    found, todo = [], [script]
+    while todo:
+        path = todo.pop()
+        if path in found:
+            continue
+        found.append(path)
+        for module in re.findall(r'^\s*(?:from|import)\s+([\w.]+)', path.read_text(), re.MULTILINE):
+            parts = module.split('.')
+            for base in (script.parent, ZIMA):
+                candidates = [base.joinpath(*parts).with_suffix('.py'), base.joinpath(*parts, '__init__.py')]
+                if len(parts) > 1:
+                    candidates.append(base.joinpath(*parts[:-1], '__init__.py'))
+                todo += [c for c in candidates if c.exists()]
+    return sorted(found)
+
+
+def library_strings(path):
+    # string literals of an imported module outside its main(), which only runs when the module is a script
+    tree = ast.parse(path.read_bytes())
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == 'main':
+            continue
+        for n in ast.walk(node):
+            if isinstance(n, ast.Constant) and isinstance(n.value, str):
+                yield n.value
+
+
+def input_files(script, sources):
+    names = {s for s in code_strings(script) if s.endswith(DATA_SUFFIXES) and '/' not in s}
+    names |= {s for source in sources if source != script for s in library_strings(source) if s.endswith(DATA_SUFFIXES) and '/' not in s}
+    return [script.parent / n for n in sorted(names)]
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def script_hash(script, sources, inputs):
+    h = hashlib.sha256()
+    for path in sources + inputs:
+        h.update(path.relative_to(ZIMA).as_posix().encode())
+        h.update(file_hash(path).encode())
+    h.update(json.dumps(ARGUMENTS.get(script.relative_to(ZIMA).as_posix(), [])).encode())
+    return h.hexdigest()
+
+
+def is_up_to_date(entry, digest, targets):
+    if not entry or entry['hash'] != digest:
+        return False
+    for image, destinations in targets.items():
+        if image not in entry['images']: # the script did not make this image last time, nothing to compare
+            continue
+        for d in destinations:
+            if not pathlib.Path(d).exists() or file_hash(d) != entry['images'][image]:
+                return False
+    return True
+
+
+def run_script(script, targets, inputs, arguments):
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in inputs: # scripts open their input relative to the working directory
+            shutil.copy(i, tmp)
+        env = dict(os.environ, SZD_BATCH = '1', MPLBACKEND = 'Agg')
+        result = subprocess.run([sys.executable, str(script), *arguments], cwd = tmp, env = env, capture_output = True, text = True)
+        if result.returncode != 0:
+            return False, result.stdout + result.stderr, {}
+
+        images = {}
+        for image, destinations in targets.items():
+            produced = pathlib.Path(tmp) / image
+            if not produced.exists():
+                continue
+            for d in destinations:
+                shutil.copy(produced, d)
+            images[image] = file_hash(produced)
+        return True, result.stdout, images
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm, rankdata
+
+from correlation import pearson_numpy, spearman_corr
+
+
+# Uncertainties of the correlation coefficients from correlation.py.
+#   - bootstrap: resample the (x, y) pairs with replacement and recompute the coefficient,
+#   - permutation: shuffle y against x to see how large the coefficient gets without any correlation.
+# The resampled indices of a whole block of replicates form one 2D integer array and all coefficients
+# of the block are computed at once. Every block has its own random stream spawned from one root seed,
+# so the replicates are the same no matter how many processes share the work.
+# Resampling with replacement always creates ties, so the Spearman replicates are Pearson coefficients of
+# average ranks instead of the formula in spearman_corr(), which is only valid without ties.
+
+
+def main():
+    df = pd.read_csv('korelace.txt', sep = '\t', names = ['temperature', 'profit'])
+    x, y = df['temperature'].to_numpy(dtype = float), df['profit'].to_numpy(dtype = float)
+
+    print("pearson_numpy = ", pearson_numpy(x, y), ", spearman_corr = ", spearman_corr(df['temperature'], df['profit']))
+    for statistic in STATISTICS:
+        result = correlation_significance(x, y, statistic, n_resamples = 20000, seed = 42)
+        print(f"{statistic} coefficient = {result['value']:.4f}, 95 % percentile interval "
+              f"[{result['percentile'][0]:.4f}, {result['percentile'][1]:.4f}], BCa interval "
+              f"[{result['bca'][0]:.4f}, {result['bca'][1]:.4f}], p-value {result['p_value']:.4f}")
+
+
+def pearson_rows(x, y):
+    # pearson_numpy() for every row of the 2D arrays x and y
+    dx = x - np.mean(x, axis = -1, keepdims = True)
+    dy = y - np.mean(y, axis = -1, keepdims = True)
+    return np.sum(dx * dy, axis = -1) / np.sqrt(np.sum(dx ** 2, axis = -1) * np.sum(dy ** 2, axis = -1))
+
+
+def spearman_rows(x, y):
+    return pearson_rows(rankdata(x, axis = -1), rankdata(y, axis = -1))
+
+
+STATISTICS = {'pearson': pearson_rows, 'spearman': spearman_rows}
+
+
+def replicate_block(x, y, statistic, kind, seed_sequence, size):
+    rng = np.random.default_rng(seed_sequence)
+    if kind == 'bootstrap':
+        index = rng.integers(0, x.size, (size, x.size)) # one row of resampled indices per replicate
+        return STATISTICS[statistic](x[index], y[index])
+    return STATISTICS[statistic](np.broadcast_to(x, (size, x.size)), rng.permuted(np.tile(y, (size, 1)), axis = 1))
+
+
+def replicates(x, y, statistic, kind, n_resamples, seed = None, block_size = 1000, workers = 1):
+    x, y = np.asarray(x, dtype = float), np.asarray(y, dtype = float)
+    sizes = [min(block_size, n_resamples - start) for start in range(0, n_resamples, block_size)]
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    seeds = seed.spawn(len(sizes))
+    arguments = (itertools.repeat(x), itertools.repeat(y), itertools.repeat(statistic), itertools.repeat(kind), seeds, sizes)
+
+    if workers == 1:
+        return np.concatenate(list(map(replicate_block, *arguments)))
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        return np.concatenate(list(pool.map(replicate_block, *arguments)))
+
+
+def percentile_interval(bootstrap, alpha = 0.05):
+    return tuple(np.quantile(bootstrap, [alpha / 2, 1 - alpha / 2]))
+
+
+def bca_interval(x, y, statistic, bootstrap, alpha = 0.05, block_size = 1000):
+    # bias-corrected and accelerated interval of Efron, the acceleration comes from the jackknife
+    x, y = np.asarray(x, dtype = float), np.asarray(y, dtype = float)
+    n = x.size
+    value = STATISTICS[statistic](x, y)
+    below = np.mean(bootstrap < value)
+    if below in (0, 1): # e.g. monotone data, every replicate equals the value: no bias correction exists
+        return percentile_interval(bootstrap, alpha)
+    bias = norm.ppf(below)
+
+    jackknife = []
+    for start in range(0, n, block_size):
+        left_out = np.arange(start, min(start + block_size, n))[:, None]
+        index = np.arange(n - 1) + (np.arange(n - 1) >= left_out) # row i skips the element left_out[i]
+        jackknife.append(STATISTICS[statistic](x[index], y[index]))
+    jackknife = np.concatenate(jackknife)
+    d = jackknife.mean() - jackknife
+    acceleration = np.sum(d ** 3) / (6 * np.sum(d ** 2) ** 1.5) if np.sum(d ** 2) > 0 else 0 # constant jackknife, no skewness
+
+    z = norm.ppf([alpha / 2, 1 - alpha / 2])
+    levels = norm.cdf(bias + (bias + z) / (1 - acceleration * (bias + z)))
+    return tuple(np.quantile(bootstrap, levels))
+
+
+def permutation_pvalue(value, permutations):
+    # two-sided p-value, the observed coefficient counts as one of the permutations
+    return (np.sum(np.abs(permutations) >= np.abs(value)) + 1) / (permutations.size + 1)
+
+
+def correlation_significance(x, y, statistic = 'pearson', n_resamples = 10000, alpha = 0.05, seed = None, workers = 1):
+    bootstrap_seed, permutation_seed = np.random.SeedSequence(seed).spawn(2)
+    value = STATISTICS[statistic](np.asarray(x, dtype = float), np.asarray(y, dtype = float))
+    bootstrap = replicates(x, y, statistic, 'bootstrap', n_resamples, bootstrap_seed, workers = workers)
+    permutations = replicates(x, y, statistic, 'permutation', n_resamples, permutation_seed, workers = workers)
+
+    return {'value': value, 'percentile': percentile_interval(bootstrap, alpha), 'bca': bca_interval(x, y, statistic, bootstrap, alpha),
+            'p_value': permutation_pvalue(value, permutations), 'resamples': n_resamples}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import numpy as np
+
+from correlation_stream import pearson_matrix
+
+
+# Rank correlations with correct handling of ties.
+#   - rank_column() sorts a column once and gives tied values the average of their ranks,
+#   - column_ranks() keeps the ranks of every column in a cache, so each column is ranked only once,
+#   - spearman_matrix() is the Pearson matrix of the ranks (one matrix product for all pairs),
+#   - kendall_tau() is the tau-b of Knight: one sort and a merge sort that counts the swapped pairs, O(n log n).
+# The formula 1 - 6 sum(d^2) / (n (n^2 - 1)) in spearman_corr() is only valid when there are no ties.
+
+
+def main():
+    import pandas as pd
+    from correlation import spearman_corr # correlation.py imports pandas and matplotlib
+
+    df = pd.read_csv('korelace.txt', sep = '\t', names = ['temperature', 'profit'])
+    df['rounded_temperature'] = df['temperature'].round() # rounding creates many ties
+
+    cache = {}
+    print("spearman_corr      = ", spearman_corr(df['rounded_temperature'], df['profit']))
+    print("spearman with ties = ", spearman_matrix(df, ['rounded_temperature', 'profit'], cache).iloc[0, 1])
+    print("kendall tau-b      = ", kendall_tau(df['rounded_temperature'], df['profit']))
+    print(spearman_matrix(df, ['temperature', 'rounded_temperature', 'profit'], cache))
+
+
+def rank_column(x):
+    x = np.asarray(x)
+    order = np.argsort(x, kind = 'stable')
+    sorted_x = x[order]
+
+    first = np.concatenate([[True], sorted_x[1:] != sorted_x[:-1]]) # first element of every group of equal values
+    starts = np.flatnonzero(first)
+    ends = np.append(starts[1:], x.size)
+    average = (starts + 1 + ends) / 2 # average of the ranks start+1 .. end of the group
+
+    ranks = np.empty(x.size)
+    ranks[order] = average[np.cumsum(first) - 1]
+    return ranks
+
+
+def column_ranks(df, columns, cache):
+    for c in columns:
+        if c not in cache:
+            cache[c] = rank_column(df[c].to_numpy())
+    return np.column_stack([cache[c] for c in columns])
+
+
+def spearman_matrix(df, columns = None, cache = None):
+    columns = list(df.columns) if columns is None else columns
+    cache = {} if cache is None else cache
+    import pandas as pd
+    # the ranks could also be fed chunk by chunk into correlation_stream.update_state()
+    return pd.DataFrame(pearson_matrix(column_ranks(df, columns, cache)), index = columns, columns = columns)
+
+
+def kendall_tau(x, y):
+    x, y = np.asarray(x), np.asarray(y)
+    n = x.size
+    pairs = n * (n - 1) // 2
+
+    order = np.lexsort((y, x)) # sort by x, equal x by y
+    x, y = x[order], y[order]
+
+    tied_x = tied_pairs(x)
+    tied_xy = tied_pairs(x, y)
+    tied_y = tied_pairs(np.sort(y))
+    swaps = count_swaps(np.unique(y, return_inverse = True)[1]) # discordant pairs, y as integers 0 .. m-1
+
+    denominator = np.sqrt(float(pairs - tied_x) * float(pairs - tied_y))
+    if denominator == 0:
+        return np.nan
+    return (pairs - tied_x - tied_y + tied_xy - 2 * swaps) / denominator
+
+
+def tied_pairs(*sorted_columns):
+    # number of pairs of equal neighbouring rows in sorted data
+    n = sorted_columns[0].size
+    first = np.ones(n, dtype = bool)
+    first[1:] = np.any([c[1:] != c[:-1] for c in sorted_columns], axis = 0)
+    sizes = np.diff(np.append(np.flatnonzero(first), n))
+    return int(np.sum(sizes * (sizes - 1) // 2))
+
+
+def count_swaps(a):
+    # number of pairs i < j with a[i] > a[j], counted by a bottom-up merge sort where every level
+    # merges all pairs of neighbouring sorted runs at once; a holds integers 0 .. m-1.
+    # The merge is a stable sort of keys that consist of two sorted runs per block, which timsort merges in
+    # linear time, so the whole count is O(n log n). The merged position of a right element tells how many
+    # left elements are not bigger than it, the rest of its left run was swapped with it.
+    a = np.asarray(a, dtype = np.int64)
+    n = a.size
+    m = int(a.max()) + 1 if n else 1
+    position = np.arange(n)
+    merged = np.empty(n, dtype = np.int64)
+    swaps = 0
+
+    width = 1
+    while width < n:
+        block = position // (2 * width) # index of the pair of runs that are merged
+        start = block * 2 * width
+        right = position - start >= width
+        key = block * m + a # blocks increase, so a stable sort only merges the two runs of every block
+
+        order = np.argsort(key, kind = 'stable') # equal values: the left element stays first
+        merged[order] = position
+        left_size = np.minimum(width, n - start) # the last block may be short
+        not_bigger = (merged - start) - (position - start - width) # left elements before this right one
+        swaps += int(np.sum((left_size - not_bigger)[right]))
+
+        a = a[order]
+        width *= 2
+
+    return swaps
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import numpy as np
+
+
+# One-pass correlation for files that do not fit into memory. The state of the computation is
+#   n    - number of rows seen so far,
+#   mean - mean of every column,
+#   M2   - matrix of the summed products of deviations from the mean (covariance matrix * (n - 1)).
+# Every chunk of the file is summarised with one matrix product and merged into the state with the
+# update of Chan, Golub and LeVeque. The same merge joins states computed by parallel workers.
+
+
+def main():
+    import pandas as pd
+    from correlation import pearson_for_cycles, pearson_numpy # correlation.py imports pandas and matplotlib
+
+    df = pd.read_csv('korelace.txt', sep = '\t', names = ['temperature', 'profit'])
+
+    state = new_state(2)
+    for chunk in pd.read_csv('korelace.txt', sep = '\t', names = ['temperature', 'profit'], chunksize = 5):
+        state = update_state(state, chunk.to_numpy(dtype = float))
+
+    print("pearson for cycles = ", pearson_for_cycles(df['temperature'].tolist(), df['profit'].tolist()))
+    print("pearson numpy      = ", pearson_numpy(df['temperature'], df['profit']))
+    print("pearson streamed   = ", pearson_from_state(state)[0, 1])
+    print("pearson matrix     = ", pearson_matrix(df.to_numpy(dtype = float))[0, 1])
+
+
+def new_state(columns):
+    return {'n': 0, 'mean': np.zeros(columns), 'M2': np.zeros((columns, columns))}
+
+
+def chunk_state(data):
+    # summary of one chunk, data has one row per measurement and one column per variable
+    data = np.asarray(data, dtype = float)
+    mean = data.mean(axis = 0)
+    deviations = data - mean
+    return {'n': data.shape[0], 'mean': mean, 'M2': deviations.T @ deviations}
+
+
+def merge_states(a, b):
+    if a['n'] == 0:
+        return b
+    if b['n'] == 0:
+        return a
+    n = a['n'] + b['n']
+    delta = b['mean'] - a['mean']
+    mean = a['mean'] + delta * (b['n'] / n)
+    M2 = a['M2'] + b['M2'] + np.outer(delta, delta) * (a['n'] * b['n'] / n)
+    return {'n': n, 'mean': mean, 'M2': M2}
+
+
+def update_state(state, data):
+    return merge_states(state, chunk_state(data))
+
+
+def covariance_from_state(state):
+    return state['M2'] / (state['n'] - 1)
+
+
+def pearson_from_state(state):
+    sigma = np.sqrt(np.diag(state['M2']))
+    return state['M2'] / np.outer(sigma, sigma)
+
+
+def stream_csv(filename, columns, chunksize = 1000000, **kwargs):
+    # correlation matrix of the chosen columns of a csv file read in chunks of 'chunksize' rows
+    import pandas as pd
+
+    state = new_state(len(columns))
+    for chunk in pd.read_csv(filename, usecols = columns, chunksize = chunksize, **kwargs):
+        state = update_state(state, chunk[columns].to_numpy(dtype = float))
+    return state
+
+
+def pearson_matrix(data):
+    # Pearson coefficients of all pairs of columns with a single matrix product
+    data = np.asarray(data, dtype = float)
+    deviations = data - data.mean(axis = 0)
+    normalised = deviations / np.sqrt(np.sum(deviations ** 2, axis = 0))
+    return normalised.T @ normalised
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import sys
+import time
+import pathlib
+import numpy as np
+
+ZIMA = str(pathlib.Path(__file__).resolve().parents[1]) # the shared modules live in zima/szd
+if ZIMA not in sys.path:
+    sys.path.append(ZIMA)
+from szd.mc_cache import cached
+
+
+# catch_apple() in newton.py checks every apple for every position of the circle. Here the apples are
+# sorted into a uniform grid of square cells once, and every circle only looks at the cells its bounding
+# box touches. The final test of a candidate apple is the very same expression as in catch_apple(),
+# so both ways give exactly the same counts.
+
+
+def main():
+    from newton import catch_apple # newton.py imports matplotlib, only the comparison needs it
+
+    apples = np.random.normal(0, 1.5, [2, 50000])
+
+    start = time.perf_counter()
+    y0, probabilities = catch_apple(apples, 0.5, 1)
+    brute_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y0_grid, probabilities_grid = catch_apple_grid(apples, 0.5, 1)
+    grid_time = time.perf_counter() - start
+
+    print(f"catch_apple: {brute_time*1e3:.1f} ms, catch_apple_grid: {grid_time*1e3:.1f} ms")
+    print(f"identical results: {np.array_equal(probabilities, probabilities_grid)}")
+
+    # the grid also works for a 2D map of circle centres and several radii at once
+    grid = build_apple_grid(apples, 0.25)
+    xc, yc = np.meshgrid(np.arange(-8, 8, 0.1), np.arange(-8, 8, 0.1))
+    counts = count_in_circles(grid, xc[..., None], yc[..., None], np.array([0.25, 0.5, 1.0]))
+    print(f"2D map of {counts.shape[0]}x{counts.shape[1]} centres for {counts.shape[2]} radii, max count {counts.max()}")
+
+
+def build_apple_grid(apples, cell_size):
+    x, y = np.asarray(apples[0]), np.asarray(apples[1])
+    x_min, y_min = x.min(), y.min()
+    nx = int((x.max() - x_min) // cell_size) + 1 # number of cells along each axis
+    ny = int((y.max() - y_min) // cell_size) + 1
+
+    ix = np.minimum(((x - x_min) // cell_size).astype(np.int64), nx - 1)
+    iy = np.minimum(((y - y_min) // cell_size).astype(np.int64), ny - 1)
+    cell = iy * nx + ix # cells are numbered row by row, so a row of neighbouring cells is one contiguous slice
+
+    order = np.argsort(cell, kind='stable')
+    starts = np.searchsorted(cell[order], np.arange(nx * ny + 1)) # apples of cell i are starts[i]:starts[i+1]
+
+    return {'x': x[order], 'y': y[order], 'starts': starts, 'x_min': x_min, 'y_min': y_min,
+            'nx': nx, 'ny': ny, 'cell_size': cell_size, 'size': x.size}
+
+
+def count_in_circles(grid, xc, yc, radius):
+    xc, yc, radius = np.broadcast_arrays(np.asarray(xc, dtype=float), np.asarray(yc, dtype=float), np.asarray(radius, dtype=float))
+    counts = np.zeros(xc.shape, dtype=np.int64)
+    x, y, starts, nx, ny = grid['x'], grid['y'], grid['starts'], grid['nx'], grid['ny']
+
+    for i in np.ndindex(xc.shape):
+        cx, cy, r = xc[i], yc[i], radius[i]
+        # cells touched by the bounding box of the circle, padded by one cell against rounding at the cell borders
+        ix0 = max(int((cx - r - grid['x_min']) // grid['cell_size']) - 1, 0)
+        ix1 = min(int((cx + r - grid['x_min']) // grid['cell_size']) + 1, nx - 1)
+        iy0 = max(int((cy - r - grid['y_min']) // grid['cell_size']) - 1, 0)
+        iy1 = min(int((cy + r - grid['y_min']) // grid['cell_size']) + 1, ny - 1)
+        if ix0 > ix1 or iy0 > iy1: # the circle lies completely outside of the grid
+            continue
+
+        total = 0
+        for iy in range(iy0, iy1 + 1):
+            a, b = starts[iy * nx + ix0], starts[iy * nx + ix1 + 1]
+            if a < b:
+                total += np.count_nonzero((x[a:b] - cx) ** 2 + (y[a:b] - cy) ** 2 <= r ** 2) # same test as in catch_apple()
+        counts[i] = total
+
+    return counts
+
+
+def catch_apple_grid(apples, radius, sample_size, y0=None, cell_size=None):
+    # drop-in replacement of catch_apple(), the circle centres stay on the y axis
+    if y0 is None:
+        y0 = np.arange(0, 8, 0.02)
+    grid = build_apple_grid(apples, cell_size if cell_size else radius / 2)
+    counts = count_in_circles(grid, 0.0, y0, radius)
+    probabilities = [count / grid['size'] * sample_size for count in counts.tolist()]
+    return y0, probabilities
+
+
+
+@cached(depends = [catch_apple_grid])
+def catch_apple_seeded(size, sigma, radius, sample_size, y0 = None, seed = None):
+    # the apples of newton.main() drawn from a seed, so the result can be cached (python zima --cache newton --seed 1)
+    apples = np.random.default_rng(seed).normal(0, sigma, [2, size])
+    return catch_apple_grid(apples, radius, sample_size, y0)
+
+
+if __name__ == "__main__":
+    main()
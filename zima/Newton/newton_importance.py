@@ -0,0 +1,135 @@
+import numpy as np
+
+from apple_grid import catch_apple_grid
+
+
+# Rare events of newton.py with importance sampling. Plain sampling spends almost all apples near the tree,
+# while the questions are about the tail: the 0.2 % of apples beyond the safe distance, or the few apples
+# that hit a head standing 5 - 8 m away. Here the apples are drawn from a proposal density q that puts
+# them where the answer is decided, and every apple carries the weight w = p / q (p is the true density of
+# the fallen apples), so the mean of w * (event) is still the probability of the event. Its standard error
+# is the standard deviation of w * (event) divided by sqrt(n), the same formula as for plain sampling.
+#   tail_probability()    - P(R > r), apples from a wider Gaussian N(0, tau^2),
+#   safe_distance()       - radius with P(R > r) = prob, from the same weighted tail,
+#   injury_probability()  - P(apple within 'radius' of (0, y0)), apples from a Gaussian shifted to the y0 band,
+#   injury_probability_disk() - the same integral with a proposal uniform over the head (weight = area * p),
+#                               the best proposal when the density changes little across one head.
+
+
+def main():
+    sigma, prob, radius, size = 1.5, 0.002, 0.5, 50000
+    rng = np.random.default_rng(1)
+    from scipy.stats import ncx2 # exact values to compare with
+
+    exact = sigma * np.sqrt(-2 * np.log(prob))
+    plain = plain_safe_distance(sigma, prob, size, rng)
+    weighted = safe_distance(sigma, prob, size, rng = rng)
+    print(f"safe distance, exact {exact:.4f} m")
+    print(f"  plain      {plain:.4f} m")
+    print(f"  importance {weighted['value']:.4f} +- {weighted['error']:.4f} m")
+
+    y0 = np.arange(5, 8, 0.02)
+    apples = rng.normal(0, sigma, [2, size])
+    y0, plain = catch_apple_grid(apples, radius, 1, y0)
+    shifted = injury_probability(y0, radius, sigma, size, rng = rng)
+    disk = injury_probability_disk(y0, radius, sigma, size, rng = rng)
+    truth = ncx2.cdf(radius**2 / sigma**2, 2, y0**2 / sigma**2) # squared distance from the head is a noncentral chi-square
+
+    print(f"injury probability with {size} apples")
+    print("   y0      exact      plain   importance (error)    disk (error)   plain apples for the importance error")
+    for i in range(0, y0.size, 25):
+        needed = truth[i] * (1 - truth[i]) / shifted['error'][i] ** 2
+        print(f"{y0[i]:5.2f} {truth[i]:10.3e} {plain[i]:10.3e} {shifted['value'][i]:10.3e} ({shifted['error'][i]:.1e}) "
+              f"{disk['value'][i]:10.3e} ({disk['error'][i]:.1e}) {needed:12.3g}")
+
+
+def gaussian_density(x, y, sigma):
+    # density of the fallen apples around the tree at the origin
+    return np.exp(-(x**2 + y**2) / (2 * sigma**2)) / (2 * np.pi * sigma**2)
+
+
+def wide_apples(sigma, tau, size, rng):
+    # apples from N(0, tau^2) and their weights p / q for the true N(0, sigma^2)
+    apples = rng.normal(0, tau, [2, size])
+    r2 = apples[0]**2 + apples[1]**2
+    weight = (tau / sigma)**2 * np.exp(-r2 / 2 * (1 / sigma**2 - 1 / tau**2))
+    return r2, weight
+
+
+def tail_probability(radii, sigma, size, tau = None, rng = None):
+    # P(R > r) for every r; R^2 is exponential, the proposal with tau = r / sqrt(2) has its mean of R^2 at r^2
+    rng = np.random.default_rng(rng)
+    radii = np.atleast_1d(np.asarray(radii, dtype = float))
+    tau = tau if tau else max(sigma, radii.max() / np.sqrt(2))
+    r2, weight = wide_apples(sigma, tau, size, rng)
+
+    # sums of w and w^2 of the apples beyond every radius, from one sort instead of one pass per radius
+    order = np.argsort(r2)
+    r2, weight = r2[order], weight[order]
+    s1 = np.concatenate([np.cumsum(weight[::-1])[::-1], [0]])
+    s2 = np.concatenate([np.cumsum(weight[::-1]**2)[::-1], [0]])
+    beyond = s1[np.searchsorted(r2, radii**2, side = 'right')]
+    beyond2 = s2[np.searchsorted(r2, radii**2, side = 'right')]
+    value = beyond / size
+    error = np.sqrt(np.maximum(beyond2 / size - value**2, 0) / (size - 1))
+    return {'radii': radii, 'value': value, 'error': error, 'samples': size, 'tau': tau}
+
+
+def safe_distance(sigma, prob, size, tau = None, rng = None):
+    # the proposal is only a guess of where the answer lies (here the Gaussian one), the weights keep any guess unbiased
+    rng = np.random.default_rng(rng)
+    tau = tau if tau else sigma * np.sqrt(-np.log(prob))
+    r2, weight = wide_apples(sigma, tau, size, rng)
+
+    order = np.argsort(r2)[::-1] # from the outside in, the weighted tail grows
+    tail = np.cumsum(weight[order]) / size
+    i = np.searchsorted(tail, prob)
+    r = np.sqrt(r2[order][min(i, size - 1)])
+
+    # error of the tail at r turned into an error of the radius with the density of R, dP/dr = 2 pi r p(r)
+    hits = weight * (r2 > r**2)
+    tail_error = hits.std(ddof = 1) / np.sqrt(size)
+    return {'value': r, 'error': tail_error / (2 * np.pi * r * gaussian_density(r, 0, sigma)), 'samples': size, 'tau': tau}
+
+
+def plain_safe_distance(sigma, prob, size, rng = None):
+    rng = np.random.default_rng(rng)
+    apples = rng.normal(0, sigma, [2, size])
+    return np.quantile((apples[0]**2 + apples[1]**2)**0.5, 1 - prob)
+
+
+def injury_probability(y0, radius, sigma, size, centre = None, scale = None, rng = None):
+    # one set of apples from N((0, centre), scale^2) serves every head position in y0
+    rng = np.random.default_rng(rng)
+    y0 = np.atleast_1d(np.asarray(y0, dtype = float))
+    centre = (y0.min() + y0.max()) / 2 if centre is None else centre
+    scale = max(sigma / 2, (y0.max() - y0.min()) / 2 + radius) if scale is None else scale
+
+    x = rng.normal(0, scale, size)
+    y = rng.normal(centre, scale, size)
+    weight = gaussian_density(x, y, sigma) / (np.exp(-(x**2 + (y - centre)**2) / (2 * scale**2)) / (2 * np.pi * scale**2))
+
+    value, error = np.zeros(y0.size), np.zeros(y0.size)
+    for i, c in enumerate(y0): # one head position at a time keeps the memory at 'size'
+        hits = np.where(x**2 + (y - c)**2 <= radius**2, weight, 0) # same test as in catch_apple()
+        value[i], error[i] = hits.mean(), hits.std(ddof = 1) / np.sqrt(size)
+    return {'y0': y0, 'value': value, 'error': error, 'samples': size, 'centre': centre, 'scale': scale}
+
+
+def injury_probability_disk(y0, radius, sigma, size, rng = None):
+    # uniform points on the head: P = (area of the head) * mean of p over the head
+    rng = np.random.default_rng(rng)
+    y0 = np.atleast_1d(np.asarray(y0, dtype = float))
+    r = radius * np.sqrt(rng.uniform(0, 1, size)) # sqrt makes the points uniform in area
+    phi = rng.uniform(0, 2 * np.pi, size)
+    dx, dy = r * np.cos(phi), r * np.sin(phi)
+
+    value, error = np.zeros(y0.size), np.zeros(y0.size)
+    for i, c in enumerate(y0): # the same points for every y0, the differences between positions are smooth
+        hits = np.pi * radius**2 * gaussian_density(dx, c + dy, sigma)
+        value[i], error[i] = hits.mean(), hits.std(ddof = 1) / np.sqrt(size)
+    return {'y0': y0, 'value': value, 'error': error, 'samples': size}
+
+
+if __name__ == "__main__":
+    main()
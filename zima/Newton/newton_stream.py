@@ -0,0 +1,125 @@
+import argparse
+import json
+import pathlib
+import sys
+
+import numpy as np
+
+from newton import find_safe_distance
+from apple_grid import build_apple_grid, count_in_circles
+
+ZIMA = str(pathlib.Path(__file__).resolve().parents[1]) # the shared modules live in zima/szd
+if ZIMA not in sys.path:
+    sys.path.append(ZIMA)
+from szd.plotting import plot_histogram
+from szd.profiling import stage, count, add_arguments, session_from_args
+
+
+# Out-of-core version of newton.main(). Apples are drawn in blocks of fixed size and every block is only
+# added to a radial histogram with fixed bin edges and to the catch_apple() counters, so the memory
+# does not depend on the total number of apples. The accumulated state together with the state of
+# the random generator can be saved to a checkpoint and the run can be resumed from it later.
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming simulation of apples falling from Newton's tree")
+    parser.add_argument("--apples", type=float, default=1e7, help="total number of apples")
+    parser.add_argument("--chunk", type=int, default=1000000, help="number of apples drawn at once")
+    parser.add_argument("--sigma", type=float, default=1.5)
+    parser.add_argument("--radius", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--checkpoint", type=pathlib.Path, default=None, help="file to save to and resume from")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with session_from_args(args):
+        state = run_stream(int(args.apples), args.chunk, args.sigma, args.radius, args.seed, args.checkpoint)
+
+        hist, edges, size = state['hist'], state['edges'], state['n']
+        with stage('safe distance'):
+            safe_zone = find_safe_distance(hist, edges, size, 0.002)
+        print(f"{size} apples, safe distance {safe_zone:.3f} m")
+
+        with stage('plot'):
+            plot_histogram(hist, edges, None, 'Radial distance', f'Fallen apples / {np.round(edges[1] - edges[0], 3)} m', safe_zone, "fallen_apples_hist.png")
+            y0, probabilities = state['y0'], state['catch'] / size
+            plot_histogram(probabilities, np.append(y0, y0[-1] + 0.02), None, 'Point of origin [m]', 'Injury probability', y0[np.where(probabilities <= 0.002)[0][0]], 'fallen_apples_finite_area.png')
+
+
+def apple_chunks(total, chunk_size, sigma, rng):
+    drawn = 0
+    while drawn < total:
+        size = min(chunk_size, total - drawn)
+        with stage('rng'):
+            apples = rng.normal(0, sigma, [2, size])
+        yield apples
+        drawn += size
+
+
+def new_state(edges, y0, radius, sigma, chunk_size):
+    return {'edges': np.asarray(edges, dtype=float), 'hist': np.zeros(len(edges) - 1, dtype=np.int64),
+            'y0': np.asarray(y0, dtype=float), 'radius': float(radius), 'catch': np.zeros(len(y0), dtype=np.int64), 'n': 0,
+            'sigma': float(sigma), 'chunk': int(chunk_size)}
+
+
+def add_chunk(state, apples):
+    with stage('distance'):
+        dist = (apples[0]**2 + apples[1]**2)**0.5
+    with stage('histogram'):
+        state['hist'] += np.histogram(dist, bins = state['edges'])[0] # apples beyond the last edge only count in 'n'
+    with stage('catch_apple'):
+        grid = build_apple_grid(apples, state['radius'] / 2)
+        state['catch'] += count_in_circles(grid, 0.0, state['y0'], state['radius'])
+    state['n'] += apples.shape[1]
+    count('apples', apples.shape[1])
+
+
+def run_stream(total, chunk_size, sigma, radius, seed=None, checkpoint=None, edges=None, y0=None):
+    requested = new_state(np.linspace(0, 8 * sigma, 501) if edges is None else edges,
+                          np.arange(0, 8, 0.02) if y0 is None else y0, radius, sigma, chunk_size)
+    if checkpoint and pathlib.Path(checkpoint).exists():
+        state, rng = load_checkpoint(checkpoint)
+        check_checkpoint(checkpoint, state, requested)
+        print(f"Resuming from {checkpoint} with {state['n']} apples")
+    else:
+        state = requested
+        rng = np.random.default_rng(seed)
+
+    for apples in apple_chunks(total - state['n'], chunk_size, sigma, rng):
+        add_chunk(state, apples)
+        if checkpoint:
+            with stage('checkpoint'):
+                save_checkpoint(checkpoint, state, rng) # the generator state is saved too, so a resumed run continues the same random stream
+
+    return state
+
+
+def check_checkpoint(fName, state, requested):
+    # the apples of a resumed run go into the same histogram and counters, so they must come from the same run
+    # (the chunk size too: with another one the random stream would differ from an uninterrupted run)
+    for key in ('sigma', 'radius', 'chunk', 'edges', 'y0'):
+        if np.shape(state[key]) != np.shape(requested[key]) or not np.array_equal(state[key], requested[key]):
+            raise ValueError(f"{fName} was saved with a different {key} than the one requested, use another checkpoint file")
+
+
+def save_checkpoint(fName, state, rng):
+    fName = pathlib.Path(fName)
+    tmp = fName.with_name(fName.name + '.tmp.npz')
+    np.savez(tmp, rng=json.dumps(rng.bit_generator.state), **state)
+    tmp.replace(fName) # an interrupted save never leaves a broken checkpoint behind
+
+
+def load_checkpoint(fName):
+    with np.load(fName) as f:
+        state = {key: f[key] for key in ('edges', 'hist', 'y0', 'catch')}
+        state['radius'], state['sigma'] = float(f['radius']), float(f['sigma'])
+        state['n'], state['chunk'] = int(f['n']), int(f['chunk'])
+        bit_state = json.loads(str(f['rng']))
+
+    rng = np.random.Generator(getattr(np.random, bit_state['bit_generator'])())
+    rng.bit_generator.state = bit_state
+    return state, rng
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import numpy as np
+
+
+# Three vectorised ways to find the safe distance from the tree:
+#   find_safe_distances()    - the same answer as find_safe_distance() in newton.py, but for many histograms at once
+#   safe_distance_quantile() - the exact empirical quantile of the raw distances, no histogram and no bin width
+#   rayleigh_safe_distance() - the closed form for the Gaussian tree, R = sigma * sqrt(-2 ln p) (see the docs)
+
+
+def main():
+    from newton import find_safe_distance # newton.py imports matplotlib, only the comparison needs it
+
+    sigmas = np.linspace(0.5, 3, 11)
+    size = 50000
+    prob = 0.002
+
+    apples = np.random.normal(0, sigmas[:, None, None], [sigmas.size, 2, size]) # one sample of apples for every sigma
+    dist = (apples[:, 0]**2 + apples[:, 1]**2)**0.5
+
+    edges = np.linspace(0, 8 * sigmas.max(), 501)
+    hist = np.array([np.histogram(d, bins = edges)[0] for d in dist])
+
+    from_hist = find_safe_distances(hist, edges, size, prob)
+    from_loop = [find_safe_distance(h, edges, size, prob) for h in hist]
+    exact = safe_distance_quantile(dist, prob)
+    theory = rayleigh_safe_distance(sigmas, prob)
+
+    print(f"histogram results identical to find_safe_distance(): {np.array_equal(from_hist, from_loop)}")
+    print(" sigma  histogram  quantile  Rayleigh")
+    for s, h, q, t in zip(sigmas, from_hist, exact, theory):
+        print(f"{s:6.2f} {h:10.3f} {q:9.3f} {t:9.3f}")
+
+
+def find_safe_distances(hist, edges, size, prob):
+    # hist has the bins in its last axis, all leading axes are independent histograms;
+    # edges, size and prob are broadcast against them
+    hist = np.asarray(hist)
+    edges = np.broadcast_to(edges, hist.shape[:-1] + (hist.shape[-1] + 1,))
+    size = np.asarray(size)[..., None]
+    limit = 1 - np.asarray(prob)[..., None]
+
+    integral = np.cumsum(hist / size, axis = -1) # same running sum as the loop in find_safe_distance()
+    integral = np.concatenate([np.zeros(integral.shape[:-1] + (1,)), integral], axis = -1) # integral before each edge
+
+    index = np.sum(integral < limit, axis = -1, keepdims = True) # first edge where the limit is reached (integral never decreases)
+    found = index < hist.shape[-1] # like the loop, the last edge is never returned
+    result = np.take_along_axis(edges, np.minimum(index, hist.shape[-1] - 1), axis = -1)
+    return np.where(found, result, np.nan)[..., 0]
+
+
+def safe_distance_quantile(dist, prob, axis = -1):
+    # the smallest distance such that at least (1 - prob) of the apples fell closer to the tree
+    dist = np.asarray(dist)
+    k = int(np.ceil((1 - prob) * dist.shape[axis] - 1e-9)) - 1 # the small shift keeps e.g. 0.998 * 50000 from rounding up
+    return np.take(np.partition(dist, k, axis = axis), k, axis = axis)
+
+
+def rayleigh_safe_distance(sigma, prob):
+    return np.asarray(sigma) * np.sqrt(-2 * np.log(prob))
+
+
+if __name__ == "__main__":
+    main()
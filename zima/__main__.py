@@ -0,0 +1,6 @@
+# "python zima <command>" from the root of the repository, see szd/cli.py
+from szd.cli import main
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import contextlib
+import json
+import os
+import pathlib
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ZIMA = pathlib.Path(__file__).resolve().parent
+for d in ['Newton', 'dalembert', 'problem tri dveri', 'Correlation', 'python_tutorial', '.']: # the scripts import their neighbours by bare name
+    sys.path.append(str(ZIMA / d))
+
+from szd.benchmark import benchmark, run, append_history, compare
+from szd.plotting import batch_mode, close_all
+from newton import catch_apple, find_safe_distance
+from apple_grid import catch_apple_grid
+from safe_distance import find_safe_distances
+from DAlembert import d_alembert_strategy, always_bet_the_same, random_bet_change
+from dalembert_batch import d_alembert_batch, always_bet_the_same_batch, random_bet_change_batch
+from dvere_vectorized import simulate_doors
+from dvere_finished import playGames
+from correlation import pearson_for_cycles, pearson_numpy, spearman_corr
+from correlation_rank import spearman_matrix
+import fourier
+from sine_fit import fit_sines
+
+
+# Benchmarks of the simulation and analysis hot paths in zima/. Every benchmark runs for several input
+# sizes and reports the time, the throughput and the peak memory. A run is appended to benchmark_history.json
+# and compared to benchmark_baseline.json, a benchmark slower than the baseline by more than --tolerance,
+# or with a peak memory larger by more than --memory-tolerance, is a regression and the script exits with 1.
+#   python benchmarks.py                      # all benchmarks
+#   python benchmarks.py --quick -k doors     # smallest size of the benchmarks with 'doors' in the name
+#   python benchmarks.py --save-baseline      # the results become the new baseline
+
+HISTORY = ZIMA / 'benchmark_history.json'
+BASELINE = ZIMA / 'benchmark_baseline.json'
+
+ROUNDS = 20 # parameters of DAlembert.main()
+BALANCE, BET, CHANGE = 200, 20, 5
+HOURS = 365 * 24
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmarks of the simulations and analyses in zima/")
+    parser.add_argument("-k", "--select", default = None, help = "run only the benchmarks whose name contains this")
+    parser.add_argument("--quick", action = "store_true", help = "only the smallest input size")
+    parser.add_argument("--repeat", type = int, default = 3, help = "timed runs per size, the fastest one counts")
+    parser.add_argument("--tolerance", type = float, default = 0.2, help = "allowed slowdown against the baseline (0.2 = 20 %%)")
+    parser.add_argument("--memory-tolerance", type = float, default = 0.2, help = "allowed growth of the peak memory against the baseline")
+    parser.add_argument("--save-baseline", action = "store_true", help = "store the results as the new baseline")
+    parser.add_argument("--no-history", action = "store_true", help = "do not append the run to the history")
+    args = parser.parse_args()
+
+    batch_mode() # fourier() and fit_with_sine() plot, the figures are only saved
+    with tempfile.TemporaryDirectory() as tmp, working_directory(tmp): # ... into a directory that is thrown away
+        results = run(BENCHMARKS, args.repeat, args.quick, args.select)
+    close_all()
+
+    if not args.no_history:
+        append_history(HISTORY, results)
+
+    if args.save_baseline:
+        baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+        baseline.update(results)
+        BASELINE.write_text(json.dumps(baseline, indent = 1, sort_keys = True))
+        print(f"Saved baseline to {BASELINE}")
+    elif BASELINE.exists():
+        regressions = compare(results, json.loads(BASELINE.read_text()), args.tolerance, args.memory_tolerance)
+        for key, quantity, old, new in regressions:
+            if quantity == 'time_min':
+                print(f"REGRESSION {key}: {old*1e3:.2f} ms -> {new*1e3:.2f} ms ({new/old:.2f}x)")
+            else:
+                print(f"REGRESSION {key}: peak memory {old/2**20:.2f} MiB -> {new/2**20:.2f} MiB ({new/max(old, 1):.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {BASELINE.name}")
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    old = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(old)
+
+
+def apples(size):
+    return np.random.default_rng(1).normal(0, 1.5, [2, size])
+
+
+def histogram(size):
+    # radial histogram of 50000 apples as in newton.main(), with 'size' bins
+    a = apples(50000)
+    hist, edges = np.histogram((a[0]**2 + a[1]**2)**0.5, bins = size)
+    return hist, edges, a.shape[1], 0.002
+
+
+def games(function, *args):
+    # the betting functions play a single game, DAlembert.main() calls them in a loop
+    def play(number_of_games):
+        return [function(*args) for g in range(number_of_games)]
+    return play
+
+
+def correlated(size):
+    rng = np.random.default_rng(2)
+    x = rng.normal(size = size)
+    return x, 0.5 * x + rng.normal(size = size)
+
+
+def hourly_series(size):
+    # 'size' hours of a temperature like series: yearly and daily period and noise
+    rng = np.random.default_rng(3)
+    t = np.arange(size)
+    temperature = 9 + 10 * np.sin(2 * np.pi * t / HOURS - 1.8) + 4 * np.sin(2 * np.pi * t / 24) + rng.normal(0, 3, size)
+    return np.arange(size).astype('datetime64[h]'), temperature
+
+
+def frame_pair(size):
+    x, y = correlated(size)
+    return pd.DataFrame({'x': x}), pd.DataFrame({'x': y})
+
+
+BENCHMARKS = [
+    benchmark('catch_apple', lambda a: catch_apple(a, 0.5, 1), lambda n: (apples(n),), [10000, 50000, 200000], 'points'),
+    benchmark('catch_apple_grid', lambda a: catch_apple_grid(a, 0.5, 1), lambda n: (apples(n),), [10000, 50000, 200000], 'points'),
+    benchmark('find_safe_distance', find_safe_distance, histogram, [500, 5000, 50000], 'points'),
+    benchmark('find_safe_distances', find_safe_distances, histogram, [500, 5000, 50000], 'points'),
+
+    benchmark('d_alembert_strategy', games(d_alembert_strategy, BALANCE, BET, ROUNDS, CHANGE), lambda n: (n,), [1000, 10000], 'games'),
+    benchmark('always_bet_the_same', games(always_bet_the_same, BALANCE, BET, ROUNDS), lambda n: (n,), [1000, 10000], 'games'),
+    benchmark('random_bet_change', games(random_bet_change, BALANCE, BET, ROUNDS, CHANGE), lambda n: (n,), [1000, 10000], 'games'),
+    benchmark('d_alembert_batch', lambda n: d_alembert_batch(n, BALANCE, BET, ROUNDS, CHANGE, 4), lambda n: (n,), [10000, 100000, 1000000], 'games'),
+    benchmark('always_bet_the_same_batch', lambda n: always_bet_the_same_batch(n, BALANCE, BET, ROUNDS, 4), lambda n: (n,), [10000, 100000, 1000000], 'games'),
+    benchmark('random_bet_change_batch', lambda n: random_bet_change_batch(n, BALANCE, BET, ROUNDS, CHANGE, 4), lambda n: (n,), [10000, 100000, 1000000], 'games'),
+
+    benchmark('playGames', playGames, lambda n: (n,), [1000, 10000, 100000], 'games'),
+    benchmark('simulate_doors', lambda n: simulate_doors(n, rng = 5), lambda n: (n,), [100000, 1000000, 10000000], 'games'),
+
+    benchmark('pearson_for_cycles', pearson_for_cycles, lambda n: tuple(v.tolist() for v in correlated(n)), [1000, 10000, 100000], 'samples'),
+    benchmark('pearson_numpy', pearson_numpy, correlated, [1000, 10000, 100000, 1000000], 'samples'),
+    benchmark('spearman_corr', spearman_corr, frame_pair, [1000, 10000, 100000, 1000000], 'samples'),
+    benchmark('spearman_matrix', lambda df: spearman_matrix(df), lambda n: (pd.DataFrame(dict(zip('xy', correlated(n)))),), [1000, 10000, 100000, 1000000], 'samples'),
+
+    benchmark('fourier', fourier.fourier, hourly_series, [HOURS, 10 * HOURS, 40 * HOURS], 'samples'),
+    benchmark('fit_with_sine', fourier.fit_with_sine, hourly_series, [HOURS, 10 * HOURS, 40 * HOURS], 'samples'),
+    benchmark('fit_sines', lambda time, data: fit_sines([data]), hourly_series, [HOURS, 10 * HOURS, 40 * HOURS], 'samples'),
+]
+
+
+if __name__ == "__main__":
+    main()
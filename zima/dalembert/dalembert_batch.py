@@ -0,0 +1,98 @@
+import sys
+import pathlib
+import numpy as np
+
+ZIMA = str(pathlib.Path(__file__).resolve().parents[1]) # the shared modules live in zima/szd
+if ZIMA not in sys.path:
+    sys.path.append(ZIMA)
+from szd.mc_cache import cached
+
+
+# Batch versions of the betting strategies from DAlembert.py. Instead of playing one game at a time,
+# all games are played at once: every round draws one coin flip per game and updates numpy arrays.
+# The scalar functions in DAlembert.py stay the reference implementation, main() compares the two.
+
+
+def main():
+    from DAlembert import d_alembert_strategy, always_bet_the_same, random_bet_change # DAlembert.py imports matplotlib
+
+    # Parameters (same as in DAlembert.py)
+    initial_balance = 200
+    base_bet = 20
+    bet_change = 5
+    rounds = 20
+    number_of_simulations = 100000
+
+    rng = np.random.default_rng()
+
+    batch = {
+        "D'Alembert": d_alembert_batch(number_of_simulations, initial_balance, base_bet, rounds, bet_change, rng),
+        "Constant bet": always_bet_the_same_batch(number_of_simulations, initial_balance, base_bet, rounds, rng),
+        "Random bet": random_bet_change_batch(number_of_simulations, initial_balance, base_bet, rounds, bet_change, rng),
+    }
+
+    number_of_scalar_games = 10000
+    scalar = {
+        "D'Alembert": np.array([d_alembert_strategy(initial_balance, base_bet, rounds, bet_change) for _ in range(number_of_scalar_games)]),
+        "Constant bet": np.array([always_bet_the_same(initial_balance, base_bet, rounds) for _ in range(number_of_scalar_games)]),
+        "Random bet": np.array([random_bet_change(initial_balance, base_bet, rounds, bet_change) for _ in range(number_of_scalar_games)]),
+    }
+
+    for name in batch:
+        b, s = batch[name], scalar[name]
+        print(f"{name:>13}: batch mean {np.mean(b):7.2f} +- {np.std(b)/np.sqrt(b.size):.2f}, "
+              f"scalar mean {np.mean(s):7.2f} +- {np.std(s)/np.sqrt(s.size):.2f}")
+
+
+def batch_rounds(strategy, number_of_games, initial_balance, base_bet, rounds, bet_change = 0, rng = None):
+    # plays the games round by round and yields (balance, current_bet, playing) after every round;
+    # strategy is 'dalembert', 'same' or 'random', the rules are the ones of the functions in DAlembert.py
+    # balance is updated in place, copy it to keep the state of a round
+    rng = np.random.default_rng(rng)
+    balance = np.full(number_of_games, initial_balance, dtype=np.int64)
+    current_bet = np.full(number_of_games, base_bet, dtype=np.int64)
+    playing = np.ones(number_of_games, dtype=bool) # games that have not gone bust yet
+
+    for r in range(rounds):
+        playing &= balance >= current_bet # once a game cannot cover its bet it stops for good
+        if not playing.any():
+            break
+
+        win = rng.integers(0, 2, number_of_games, dtype=np.int8).astype(bool) # 0 = loss, 1 = win
+        balance += np.where(playing, np.where(win, current_bet, -current_bet), 0)
+
+        if strategy == 'dalembert':
+            new_bet = np.where(win, np.maximum(1, current_bet - bet_change), current_bet + bet_change) # decrease after a win, increase after a loss
+            current_bet = np.where(playing, new_bet, current_bet)
+        elif strategy == 'random':
+            raise_bet = rng.integers(0, 2, number_of_games, dtype=np.int8).astype(bool) # the bet goes randomly up or down
+            new_bet = np.where(raise_bet, current_bet + bet_change, np.maximum(1, current_bet - bet_change))
+            current_bet = np.where(playing, new_bet, current_bet)
+
+        yield balance, current_bet, playing
+
+
+def final_balance(strategy, number_of_games, initial_balance, base_bet, rounds, bet_change = 0, rng = None):
+    balance = np.full(number_of_games, initial_balance, dtype=np.int64) # returned as it is when no round is played
+    for balance, current_bet, playing in batch_rounds(strategy, number_of_games, initial_balance, base_bet, rounds, bet_change, rng):
+        pass
+    return balance
+
+
+@cached()
+def d_alembert_batch(number_of_games, initial_balance, base_bet, rounds, bet_change, rng=None):
+    return final_balance('dalembert', number_of_games, initial_balance, base_bet, rounds, bet_change, rng)
+
+
+@cached()
+def always_bet_the_same_batch(number_of_games, initial_balance, base_bet, rounds, rng=None):
+    return final_balance('same', number_of_games, initial_balance, base_bet, rounds, 0, rng)
+
+
+@cached()
+def random_bet_change_batch(number_of_games, initial_balance, base_bet, rounds, bet_change, rng=None):
+    return final_balance('random', number_of_games, initial_balance, base_bet, rounds, bet_change, rng)
+
+
+if __name__ == "__main__":
+    main()
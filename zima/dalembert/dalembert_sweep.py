@@ -0,0 +1,81 @@
+import argparse
+import csv
+import itertools
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dalembert_batch import d_alembert_batch, always_bet_the_same_batch, random_bet_change_batch
+
+
+# Parameter sweep over the D'Alembert simulation. Every point of the parameter grid gets its own random
+# stream spawned from one root numpy.random.SeedSequence, so the resulting table only depends on the
+# root seed - not on the number of worker processes or on the order in which the workers finish.
+
+STRATEGIES = ["DAlembert", "sameBet", "randomBet"]
+
+COLUMNS = ["initial_balance", "base_bet", "bet_change", "rounds", "strategy", "games",
+           "mean", "std", "sem", "below_base_bet", "min", "median", "max"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parameter sweep of the D'Alembert betting simulation")
+    parser.add_argument("--initial-balance", type=int, nargs="+", default=[200])
+    parser.add_argument("--base-bet", type=int, nargs="+", default=[20])
+    parser.add_argument("--bet-change", type=int, nargs="+", default=[5])
+    parser.add_argument("--rounds", type=int, nargs="+", default=[20])
+    parser.add_argument("--games", type=int, default=100000, help="number of games per grid point and strategy")
+    parser.add_argument("--seed", type=int, default=0, help="root seed of the sweep")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: all cores)")
+    parser.add_argument("--output", type=pathlib.Path, default=pathlib.Path("DAlembert_sweep.csv"))
+    args = parser.parse_args()
+
+    grid = make_grid(args.initial_balance, args.base_bet, args.bet_change, args.rounds)
+    fName = run_sweep(grid, args.games, args.seed, args.output, args.workers)
+    print(f"Saved {len(grid) * len(STRATEGIES)} rows as {fName.resolve()}")
+
+
+def make_grid(initial_balances, base_bets, bet_changes, rounds):
+    return [dict(initial_balance=i, base_bet=b, bet_change=c, rounds=r)
+            for i, b, c, r in itertools.product(initial_balances, base_bets, bet_changes, rounds)]
+
+
+def run_sweep(grid, number_of_games, seed, fName, workers=None):
+    fName = pathlib.Path(fName)
+    seeds = np.random.SeedSequence(seed).spawn(len(grid)) # one independent stream per grid point
+
+    with open(fName, "w", newline="") as f, ProcessPoolExecutor(max_workers=workers) as pool:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        # map() yields the results in grid order, so each row is written as soon as its point is done
+        for rows in pool.map(simulate_point, grid, itertools.repeat(number_of_games), seeds):
+            writer.writerows(rows)
+            f.flush()
+
+    return fName
+
+
+def simulate_point(parameters, number_of_games, seed_sequence):
+    # every strategy gets its own child stream, so adding a strategy does not change the others
+    rngs = [np.random.default_rng(s) for s in seed_sequence.spawn(len(STRATEGIES))]
+    p = parameters
+
+    final_balances = [
+        d_alembert_batch(number_of_games, p["initial_balance"], p["base_bet"], p["rounds"], p["bet_change"], rngs[0]),
+        always_bet_the_same_batch(number_of_games, p["initial_balance"], p["base_bet"], p["rounds"], rngs[1]),
+        random_bet_change_batch(number_of_games, p["initial_balance"], p["base_bet"], p["rounds"], p["bet_change"], rngs[2]),
+    ]
+
+    rows = []
+    for strategy, balance in zip(STRATEGIES, final_balances):
+        std = np.std(balance)
+        rows.append([p["initial_balance"], p["base_bet"], p["bet_change"], p["rounds"], strategy, number_of_games,
+                     np.mean(balance), std, std / np.sqrt(balance.size),
+                     np.mean(balance < p["base_bet"]), # fraction of games that ended unable to pay the first bet
+                     balance.min(), np.median(balance), balance.max()])
+    return rows
+
+
+if __name__ == "__main__":
+    main()
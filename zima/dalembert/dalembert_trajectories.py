@@ -0,0 +1,214 @@
+import sys
+import json
+import pathlib
+import numpy as np
+
+from dalembert_batch import batch_rounds
+
+ZIMA = str(pathlib.Path(__file__).resolve().parents[1]) # the shared modules live in zima/szd
+if ZIMA not in sys.path:
+    sys.path.append(ZIMA)
+
+
+# Whole games of the betting strategies instead of the final balance only. The games are played in chunks
+# with batch_rounds() and every chunk is stored in compact arrays:
+#   balance  - int16/int32 (the smallest type that can hold the largest possible balance), bet the same,
+#   offsets  - int64, the rounds of game i are balance[offsets[i]:offsets[i+1]], starting with the initial
+#              balance; a game that went bust early is shorter, nothing is stored for the rounds it missed,
+#   bet[k]   - the bet that goes with balance[k], i.e. the bet of the next round.
+# With a directory the chunks are appended to balance.bin and bet.bin and load_trajectories() opens them
+# memory-mapped, so millions of games never have to be in memory at once.
+# The ruin time (round in which a game can no longer cover its bet) and the maximal drawdown (largest drop
+# from the highest balance reached so far) are counted into histograms while the games are played,
+# trajectory_statistics() does only that and stores no games at all.
+
+STRATEGIES = {'dalembert': "D'Alembert", 'same': "Constant bet", 'random': "Random bet"}
+
+
+def main():
+    # Parameters (same as in DAlembert.py)
+    initial_balance = 200
+    base_bet = 20
+    bet_change = 5
+    rounds = 20
+    number_of_games = 100000
+
+    from dalembert_batch import d_alembert_batch
+    games = record_trajectories('dalembert', number_of_games, initial_balance, base_bet, rounds, bet_change, rng = 1)
+    last = games['balance'][games['offsets'][1:] - 1]
+    print(f"final balances identical to d_alembert_batch(): {np.array_equal(last, d_alembert_batch(number_of_games, initial_balance, base_bet, rounds, bet_change, 1))}")
+    print(f"{games['balance'].size} rounds stored in {games['balance'].nbytes + games['bet'].nbytes + games['offsets'].nbytes} bytes "
+          f"({games['balance'].dtype}, {games['bet'].dtype})")
+
+    results = {}
+    for strategy, name in STRATEGIES.items():
+        results[name] = trajectory_statistics(strategy, number_of_games * 10, initial_balance, base_bet, rounds, bet_change, rng = 2)
+        print_statistics(name, results[name])
+    plot_statistics(results)
+
+
+def compact_dtype(largest):
+    for dtype in (np.int16, np.int32):
+        if largest <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def balance_bounds(strategy, initial_balance, base_bet, rounds, bet_change):
+    # the bet grows by at most bet_change per round, the balance by at most the bet
+    largest_bet = base_bet if strategy == 'same' else base_bet + rounds * bet_change
+    return initial_balance + rounds * largest_bet, largest_bet
+
+
+def new_statistics(rounds):
+    return {'games': 0, 'ruined': 0, 'ruin_time': np.zeros(rounds + 1, dtype = np.int64),
+            'drawdown': np.zeros(1, dtype = np.int64), 'final_sum': 0, 'final_sum2': 0}
+
+
+def add_statistics(statistics, played, ruined, drawdown, balance):
+    statistics['games'] += balance.size
+    statistics['ruined'] += int(ruined.sum())
+    statistics['ruin_time'] += np.bincount(played[ruined], minlength = statistics['ruin_time'].size)
+    counts = np.bincount(drawdown) # drawdowns are whole numbers, the histogram grows with the largest one
+    if counts.size > statistics['drawdown'].size:
+        statistics['drawdown'] = np.concatenate([statistics['drawdown'], np.zeros(counts.size - statistics['drawdown'].size, dtype = np.int64)])
+    statistics['drawdown'][:counts.size] += counts
+    statistics['final_sum'] += int(balance.sum())
+    statistics['final_sum2'] += int((balance.astype(np.float64) ** 2).sum())
+
+
+def play_chunk(strategy, size, initial_balance, base_bet, rounds, bet_change, rng, history = None):
+    # plays one chunk; the running peak and drawdown only need the current round, history (if given) gets every round
+    peak = np.full(size, initial_balance, dtype = np.int64)
+    drawdown = np.zeros(size, dtype = np.int64)
+    played = np.zeros(size, dtype = np.int64)
+    balance = np.full(size, initial_balance, dtype = np.int64)
+    current_bet = np.full(size, base_bet, dtype = np.int64)
+    if history is not None:
+        history['balance'][0], history['bet'][0] = balance, current_bet
+
+    for r, (balance, current_bet, playing) in enumerate(batch_rounds(strategy, size, initial_balance, base_bet, rounds, bet_change, rng)):
+        played += playing
+        np.maximum(peak, balance, out = peak)
+        np.maximum(drawdown, peak - balance, out = drawdown)
+        if history is not None:
+            history['balance'][r + 1], history['bet'][r + 1] = balance, current_bet
+
+    ruined = balance < current_bet # the game could not go on, even if all rounds were played
+    return played, ruined, drawdown, balance
+
+
+def trajectory_statistics(strategy, number_of_games, initial_balance, base_bet, rounds, bet_change = 0, rng = None, chunk_size = 100000):
+    rng = np.random.default_rng(rng)
+    statistics = new_statistics(rounds)
+    for start in range(0, number_of_games, chunk_size):
+        size = min(chunk_size, number_of_games - start)
+        add_statistics(statistics, *play_chunk(strategy, size, initial_balance, base_bet, rounds, bet_change, rng))
+    return statistics
+
+
+def record_trajectories(strategy, number_of_games, initial_balance, base_bet, rounds, bet_change = 0, rng = None,
+                        directory = None, chunk_size = 100000):
+    rng = np.random.default_rng(rng)
+    largest_balance, largest_bet = balance_bounds(strategy, initial_balance, base_bet, rounds, bet_change)
+    balance_dtype, bet_dtype = compact_dtype(largest_balance), compact_dtype(largest_bet)
+    statistics = new_statistics(rounds)
+    offsets = np.zeros(number_of_games + 1, dtype = np.int64)
+
+    if directory:
+        directory = pathlib.Path(directory)
+        directory.mkdir(parents = True, exist_ok = True)
+        files = {key: open(directory / f'{key}.bin', 'wb') for key in ('balance', 'bet')}
+    else:
+        capacity = number_of_games * (rounds + 1) # preallocated for the longest possible games, trimmed at the end
+        stored = {'balance': np.empty(capacity, dtype = balance_dtype), 'bet': np.empty(capacity, dtype = bet_dtype)}
+
+    # one chunk of whole games, rounds x games, is the only dense array
+    history = {'balance': np.empty((rounds + 1, min(chunk_size, number_of_games)), dtype = balance_dtype),
+               'bet': np.empty((rounds + 1, min(chunk_size, number_of_games)), dtype = bet_dtype)}
+    try:
+        for start in range(0, number_of_games, chunk_size):
+            size = min(chunk_size, number_of_games - start)
+            chunk = {key: value[:, :size] for key, value in history.items()}
+            played, ruined, drawdown, balance = play_chunk(strategy, size, initial_balance, base_bet, rounds, bet_change, rng, chunk)
+            add_statistics(statistics, played, ruined, drawdown, balance)
+
+            # rows of each game up to the rounds it played, game after game
+            keep = (np.arange(rounds + 1)[:, None] <= played[None, :]).T
+            offsets[start + 1:start + size + 1] = offsets[start] + np.cumsum(played + 1)
+            for key, value in chunk.items():
+                ragged = value.T[keep]
+                if directory:
+                    files[key].write(ragged.tobytes())
+                else:
+                    stored[key][offsets[start]:offsets[start + size]] = ragged
+    finally:
+        if directory:
+            for f in files.values():
+                f.close()
+
+    if directory:
+        np.save(directory / 'offsets.npy', offsets)
+        meta = {'strategy': strategy, 'initial_balance': initial_balance, 'base_bet': base_bet, 'rounds': rounds,
+                'bet_change': bet_change, 'balance_dtype': balance_dtype.str, 'bet_dtype': bet_dtype.str}
+        (directory / 'meta.json').write_text(json.dumps(meta))
+        return dict(load_trajectories(directory), statistics = statistics)
+    return {'balance': stored['balance'][:offsets[-1]], 'bet': stored['bet'][:offsets[-1]], 'offsets': offsets, 'statistics': statistics}
+
+
+def load_trajectories(directory):
+    directory = pathlib.Path(directory)
+    meta = json.loads((directory / 'meta.json').read_text())
+    offsets = np.load(directory / 'offsets.npy', mmap_mode = 'r')
+    if offsets[-1] == 0: # np.memmap cannot map an empty file
+        return {'balance': np.empty(0, meta['balance_dtype']), 'bet': np.empty(0, meta['bet_dtype']), 'offsets': offsets, 'meta': meta}
+    return {'balance': np.memmap(directory / 'balance.bin', dtype = meta['balance_dtype'], mode = 'r'),
+            'bet': np.memmap(directory / 'bet.bin', dtype = meta['bet_dtype'], mode = 'r'), 'offsets': offsets, 'meta': meta}
+
+
+def game(trajectories, i):
+    a, b = trajectories['offsets'][i], trajectories['offsets'][i + 1]
+    return trajectories['balance'][a:b], trajectories['bet'][a:b]
+
+
+def summary(statistics):
+    games, ruin_time, drawdown = statistics['games'], statistics['ruin_time'], statistics['drawdown']
+    mean = statistics['final_sum'] / games
+    cumulative = np.cumsum(drawdown) / games
+    return {'games': games, 'mean': mean,
+            'error': np.sqrt(max(statistics['final_sum2'] / games - mean ** 2, 0) / games),
+            'ruin_probability': statistics['ruined'] / games,
+            'mean_ruin_time': (ruin_time * np.arange(ruin_time.size)).sum() / max(statistics['ruined'], 1),
+            'mean_drawdown': (drawdown * np.arange(drawdown.size)).sum() / games,
+            'median_drawdown': int(np.searchsorted(cumulative, 0.5)),
+            'drawdown_95': int(np.searchsorted(cumulative, 0.95))}
+
+
+def print_statistics(name, statistics):
+    s = summary(statistics)
+    print(f"{name:>13}: final balance {s['mean']:7.2f} +- {s['error']:.2f}, ruined {100 * s['ruin_probability']:5.2f} % "
+          f"after {s['mean_ruin_time']:5.2f} rounds on average, drawdown mean {s['mean_drawdown']:6.1f} "
+          f"median {s['median_drawdown']} 95 % {s['drawdown_95']}")
+
+
+def plot_statistics(results, filename = "DAlembert_ruin.png"):
+    from szd.plotting import figure # imported here, the statistics alone do not need matplotlib
+
+    with figure(filename) as (fig, ax):
+        for name, statistics in results.items():
+            ax.stairs(statistics['ruin_time'] / statistics['games'], np.arange(statistics['ruin_time'].size + 1) - 0.5, label = name)
+        ax.set_xlabel("Round of the ruin")
+        ax.set_ylabel("Fraction of games")
+        ax.legend()
+
+    with figure(filename.replace('ruin', 'drawdown')) as (fig, ax):
+        for name, statistics in results.items():
+            ax.stairs(statistics['drawdown'] / statistics['games'], np.arange(statistics['drawdown'].size + 1) - 0.5, label = name)
+        ax.set_yscale('log')
+        ax.set_xlabel("Maximal drawdown")
+        ax.set_ylabel("Fraction of games")
+        ax.legend()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import sys
+import pathlib
+import numpy as np
+
+from dvere_vectorized import simulate_doors
+
+ZIMA = str(pathlib.Path(__file__).resolve().parents[1]) # the shared modules live in zima/szd
+if ZIMA not in sys.path:
+    sys.path.append(ZIMA)
+from szd.mc_cache import cached
+
+
+# plotTimeDevelopment() of dvere_empty.py needs the whole 0/1 list of every game to make its cumulative sums.
+# Here the games are simulated in blocks and only the running number of successes at log-spaced checkpoints
+# is kept, so the memory is given by the number of checkpoints and the block size, not by the number of games.
+# dvere_finished.py plays its games one by one but keeps the same record and plots it with plotConvergence().
+
+
+def main():
+    nIter = int(1e8) # number of iterations
+
+    record = track_convergence(nIter)
+    print(f"Number of iterations: {nIter}")
+    print(f"Original selection correct: {record['old'][-1]} ({record['old'][-1]/nIter:.4f})")
+    print(f"New selection correct: {record['new'][-1]} ({record['new'][-1]/nIter:.4f})")
+
+    fName = plotConvergence(record)
+    print(f"Saved plot as {fName.resolve()}")
+
+
+def log_checkpoints(nIter, nPoints = 200):
+    return np.unique(np.geomspace(1, nIter, nPoints).round().astype(np.int64))
+
+
+@cached(depends = [simulate_doors])
+def track_convergence(nIter, nDoors = 3, nOpened = 1, nPoints = 200, rng = None, chunk_size = 1000000):
+    rng = np.random.default_rng(rng)
+    checkpoints = log_checkpoints(nIter, nPoints)
+    old = np.zeros(checkpoints.size, dtype = np.int64)
+    new = np.zeros(checkpoints.size, dtype = np.int64)
+
+    done, oldSum, newSum = 0, 0, 0
+    for start in range(0, nIter, chunk_size):
+        n = min(chunk_size, nIter - start)
+        oldSelectionCorrect, newSelectionCorrect = simulate_doors(n, nDoors, nOpened, rng)
+
+        # checkpoints inside this block read the running sum of the block
+        inside = (checkpoints > done) & (checkpoints <= done + n)
+        if inside.any():
+            position = checkpoints[inside] - done - 1
+            old[inside] = oldSum + np.cumsum(oldSelectionCorrect)[position]
+            new[inside] = newSum + np.cumsum(newSelectionCorrect)[position]
+
+        done += n
+        oldSum += int(oldSelectionCorrect.sum())
+        newSum += int(newSelectionCorrect.sum())
+
+    return {'n': checkpoints, 'old': old, 'new': new, 'doors': nDoors, 'opened': nOpened}
+
+
+def wilson_interval(successes, n, z = 1.96):
+    # Wilson score interval of a binomial success rate, z = 1.96 gives 95 % coverage
+    p = successes / n
+    centre = (p + z**2 / (2 * n)) / (1 + z**2 / n)
+    halfWidth = z / (1 + z**2 / n) * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2))
+    return np.clip(centre - halfWidth, 0, 1), np.clip(centre + halfWidth, 0, 1)
+
+
+def plotConvergence(record, fName = "dvere.png"):
+    import matplotlib.pyplot as plt # imported here, the simulation alone does not need matplotlib
+
+    n = record['n']
+    fig, ax = plt.subplots()
+
+    for key, label, c in [('old', "Old selection correct", "C0"), ('new', "New selection correct", "C1")]:
+        low, high = wilson_interval(record[key], n)
+        ax.plot(n, record[key] / n, c = c, marker = "o", markersize = 2, label = label)
+        ax.fill_between(n, low, high, color = c, alpha = .3, linewidth = 0)
+
+    nDoors, nOpened = record['doors'], record['opened']
+    ax.plot([n[0], n[-1]], [1/nDoors, 1/nDoors], linestyle="--", c="black")
+    ax.plot([n[0], n[-1]], [(nDoors - 1)/(nDoors * (nDoors - 1 - nOpened))]*2, linestyle="--", c="black")
+
+    plt.ylabel("Success rate [-]")
+    plt.xlabel("Number of iterations [-]")
+
+    plt.legend()
+
+    ax.set_xscale("log")
+
+    fName = pathlib.Path(fName)
+    fig.savefig(fName, dpi=250)
+    plt.close(fig)
+    return fName
+
+
+if __name__ == "__main__":
+    main()
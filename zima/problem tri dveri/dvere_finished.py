@@ -1,15 +1,31 @@
 import random
 import numpy as np
-import matplotlib.pyplot as plt
-import pathlib
+
+from dvere_convergence import log_checkpoints, plotConvergence
 
 def main():
     nIter = 1e3 # number of iterations
 
-    oldSelectionCorrect = []
-    newSelectionCorrect = []
+    record = playGames(int(nIter))
+    oldCorrect, newCorrect = record['old'][-1], record['new'][-1]
+
+    print(f"Number of iterations: {nIter}")
+    print(f"Original selection correct: {oldCorrect} ({oldCorrect/nIter:.3f} %)")
+    print(f"New selection correct: {newCorrect} ({newCorrect/nIter:.3f} %)")
+
+    fName = plotConvergence(record)
+    print(f"Saved plot as {fName.resolve()}")
 
-    for i in range(int(nIter)):
+def playGames(nIter, nPoints = 200):
+    # only the number of correct selections at the checkpoints is kept, not a 0/1 entry for every game
+    checkpoints = log_checkpoints(nIter, nPoints)
+    old = np.zeros(checkpoints.size, dtype = np.int64)
+    new = np.zeros(checkpoints.size, dtype = np.int64)
+    oldSelectionCorrect = 0
+    newSelectionCorrect = 0
+    k = 0
+
+    for i in range(nIter):
         doors = ["Door1", "Door2", "Door3"]
 
         # we randomly select one door as the correct door
@@ -26,46 +42,21 @@ def main():
         # new selection would now be to pick the other unopened door
         newSelection = [d for d in doors if d != selectedDoor and d != openedDoor][0]
         
-        # we save which decision would be better
-        oldSelectionCorrect += [1] if correctDoor == selectedDoor else [0]
-        newSelectionCorrect += [1] if correctDoor == newSelection else [0]
+        # we count which decision would be better
+        oldSelectionCorrect += correctDoor == selectedDoor
+        newSelectionCorrect += correctDoor == newSelection
 
-    print(f"Number of iterations: {nIter}")
-    print(f"Original selection correct: {sum(oldSelectionCorrect)} ({sum(oldSelectionCorrect)/nIter:.3f} %)")
-    print(f"New selection correct: {sum(newSelectionCorrect)} ({sum(newSelectionCorrect)/nIter:.3f} %)")
+        if i + 1 == checkpoints[k]:
+            old[k], new[k] = oldSelectionCorrect, newSelectionCorrect
+            k = min(k + 1, checkpoints.size - 1)
 
-    fName = plotTimeDevelopment(oldSelectionCorrect, newSelectionCorrect)
-    print(f"Saved plot as {fName.resolve()}")
+    return {'n': checkpoints, 'old': old, 'new': new, 'doors': 3, 'opened': 1}
 
 def plotTimeDevelopment(oldSelectionCorrect, newSelectionCorrect):
-    # calculate the cumulative sum
-    oldSelectionCorrect_cummulative = np.cumsum(oldSelectionCorrect)
-    newSelectionCorrect_cummulative = np.cumsum(newSelectionCorrect)
-
-    total = oldSelectionCorrect_cummulative + newSelectionCorrect_cummulative
-
-    fig, ax = plt.subplots()
-
-    x = np.arange(len(oldSelectionCorrect_cummulative))+1
-    ax.scatter(x, oldSelectionCorrect_cummulative / total, s=2, label = "Old selection correct")
-    ax.scatter(x, newSelectionCorrect_cummulative / total, s=2, label = "New selection correct")
-
-    ax.plot(x, oldSelectionCorrect_cummulative / total, alpha=.3)
-    ax.plot(x, newSelectionCorrect_cummulative / total, alpha=.3)
-
-    ax.plot([x[0], x[-1]], [1/3, 1/3], linestyle="--", c="black")
-    ax.plot([x[0], x[-1]], [2/3, 2/3], linestyle="--", c="black")
-
-    plt.ylabel("Success rate [%]")
-    plt.xlabel("Number of iterations [-]")
-
-    plt.legend()
-
-    ax.set_xscale("log")
-
-    fName = pathlib.Path("dvere.png")
-    fig.savefig(fName, dpi=250)
-    return fName
+    # the 0/1 lists of dvere_empty.py, turned into the record of playGames() and plotted the same way
+    n = log_checkpoints(len(oldSelectionCorrect))
+    record = {'n': n, 'old': np.cumsum(oldSelectionCorrect)[n - 1], 'new': np.cumsum(newSelectionCorrect)[n - 1], 'doors': 3, 'opened': 1}
+    return plotConvergence(record)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
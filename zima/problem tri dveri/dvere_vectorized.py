@@ -0,0 +1,87 @@
+import sys
+import time
+import pathlib
+import numpy as np
+
+ZIMA = str(pathlib.Path(__file__).resolve().parents[1]) # the shared modules live in zima/szd
+if ZIMA not in sys.path:
+    sys.path.append(ZIMA)
+from szd.mc_cache import cached
+
+
+# Array version of the game from dvere_finished.py, generalised to N doors of which the host opens K.
+# Doors are numbered 0 .. N-1 and all games of one block are played at once as (doors x games) arrays:
+#   - the correct and the selected door are random integer arrays turned into boolean masks,
+#   - every door gets a random key, the selected and the correct door get a key that can never be the smallest,
+#     and the host opens the K doors with the smallest keys (a random choice among the allowed doors),
+#   - the player who switches picks one of the remaining closed doors in the same way.
+
+
+def main():
+    nIter = int(1e7) # number of iterations
+
+    start = time.perf_counter()
+    oldSelectionCorrect, newSelectionCorrect = simulate_doors(nIter)
+    elapsed = time.perf_counter() - start
+
+    print(f"Number of iterations: {nIter} ({nIter/elapsed:.3g} games/s)")
+    print(f"Original selection correct: {oldSelectionCorrect.sum()} ({oldSelectionCorrect.mean():.4f})")
+    print(f"New selection correct: {newSelectionCorrect.sum()} ({newSelectionCorrect.mean():.4f})")
+
+    print("\ndoors opened   stay  (theory)  switch  (theory)")
+    for r in sweep_doors(int(1e6), [3, 4, 5, 10], [1, 2, 3, 8]):
+        print(f"{r['doors']:5d} {r['opened']:6d} {r['stay']:7.4f} {r['stay_theory']:8.4f} {r['switch']:8.4f} {r['switch_theory']:8.4f}")
+
+
+@cached()
+def simulate_doors(nIter, nDoors = 3, nOpened = 1, rng = None, chunk_size = 65536):
+    if not 0 <= nOpened <= nDoors - 2:
+        raise ValueError(f"the host can open 0 to {nDoors - 2} of {nDoors} doors, not {nOpened}")
+    rng = np.random.default_rng(rng)
+    doors = np.arange(nDoors)[:, None] # arrays below are (doors x games), one row per door
+
+    oldSelectionCorrect = np.empty(nIter, dtype = bool)
+    newSelectionCorrect = np.empty(nIter, dtype = bool)
+
+    for start in range(0, nIter, chunk_size): # small blocks keep the (doors x games) arrays in the cache
+        n = min(chunk_size, nIter - start)
+
+        isCorrect = doors == rng.integers(0, nDoors, n)
+        isSelected = doors == rng.integers(0, nDoors, n)
+
+        # the host opens nOpened doors that are neither selected nor correct,
+        # adding 1 to the key (keys are below 1) takes a door out of the draw
+        isOpened = np.zeros((nDoors, n), dtype = bool)
+        keys = rng.random((nDoors, n))
+        keys += isSelected | isCorrect
+        for k in range(nOpened):
+            isSmallest = keys == keys.min(axis = 0) # equal float64 keys are practically impossible
+            isOpened |= isSmallest
+            keys += isSmallest
+
+        # the new selection is a random closed door other than the selected one
+        keys = rng.random((nDoors, n))
+        keys += isSelected | isOpened
+        isNewSelection = keys == keys.min(axis = 0)
+
+        oldSelectionCorrect[start:start + n] = (isCorrect & isSelected).any(axis = 0)
+        newSelectionCorrect[start:start + n] = (isCorrect & isNewSelection).any(axis = 0)
+
+    return oldSelectionCorrect, newSelectionCorrect
+
+
+def sweep_doors(nIter, doors, opened, rng = None):
+    rng = np.random.default_rng(rng)
+    results = []
+    for nDoors in doors:
+        for nOpened in opened:
+            if nOpened > nDoors - 2:
+                continue
+            old, new = simulate_doors(nIter, nDoors, nOpened, rng)
+            results.append({'doors': nDoors, 'opened': nOpened, 'stay': old.mean(), 'switch': new.mean(),
+                            'stay_theory': 1 / nDoors, 'switch_theory': (nDoors - 1) / (nDoors * (nDoors - 1 - nOpened))})
+    return results
+
+
+if __name__ == "__main__":
+    main()
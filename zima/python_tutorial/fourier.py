@@ -1,17 +1,21 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-from scipy.fft import fft, fftfreq
+import sys
+import pathlib
 import numpy as np
-from scipy.optimize import curve_fit
+
+ZIMA = str(pathlib.Path(__file__).resolve().parents[1]) # the shared modules live in zima/szd
+if ZIMA not in sys.path:
+    sys.path.append(ZIMA)
+from szd.plotting import simple_plot, plot_histogram2d
+from spectral import series_spectrum, plot_spectra
 
 
 def main():
+    #from weather_cache import load_weather
     #filename = 'weather_data.csv'
-    #df = pd.read_csv(filename)
-    #time = pd.to_datetime(df['utc_timestamp'])
+    #time, columns = load_weather(filename)
 
-    #fourier(time, df['CZ_temperature'].to_numpy())
-    #fit_with_sine(time, df['CZ_temperature'].to_numpy())
+    #fourier(time, np.asarray(columns['CZ_temperature']))
+    #fit_with_sine(time, np.asarray(columns['CZ_temperature']))
 
     # random_data1D = np.random.uniform(0,1,10000)
     # values, edges = np.histogram(random_data1D, bins = 100)
@@ -34,44 +38,12 @@ def main():
     hist2, xedges, yedges = np.histogram2d(*gaus2, bins = [xedges, yedges])
     hist = hist1 + hist2
 
-    plot_histogram(hist, xedges, yedges, 'x label', 'y label', '2d_histogram.png')
-
-
-def plot_histogram(hist, xedges, yedges, xlabel, ylabel, filename = None):
-
-    plt.rcParams['font.size'] = 14
-    fig, ax = plt.subplots(figsize = [8,6])
-    hist_fig = ax.imshow(hist, extent = [xedges[0], xedges[-1], yedges[0], yedges[-1]])
-    fig.colorbar(hist_fig)
-    ax.set_xlabel(xlabel)
-    ax.set_ylabel(ylabel)
-    plt.show()
-    if filename:
-        fig.savefig(filename)
-
-
-def simple_plot(xdata, ydata, labels, filename, xlabel, ylabel): #function for plotting several datasets into the same image, x and ydata are expected to be lists of arrays. If only a single dataset is to be plotted, it must also be inside a list -> dataset = [dataset]
-
-    plt.rcParams['font.size'] = 14 # changes font size
-    fig, ax = plt.subplots(figsize = [8,6]) # creates a figure and a subplot object
-
-    for x, y, l in zip(xdata, ydata, labels): # loop over several arrays at once (cuts when the first array finishes)
-        ax.plot(x, y, label = l) # line plot of x and y with a label to displayed inside a legend
-
-    ax.legend() # includes a legend in the image
-    ax.set_xlabel(xlabel) # gives a name to the x axis, below analogy for y axis
-    ax.set_ylabel(ylabel) # matplotlib supports latex like math type-setting
-
-    plt.show() # displays the current figure 
-    fig.savefig(filename) # saves the figure 'fig' as a png file
+    plot_histogram2d(hist, xedges, yedges, 'x label', 'y label', '2d_histogram.png')
 
 
 def fourier(time, data):
-    yf = fft(data) # performs a fast fourier transform on our dataset
-    xf = fftfreq(time.size, 1) # calculates the sampling frequency bins (used for plotting) based on the length of our dataset
-
-    periods = 1 / xf / 24
-    simple_plot([periods], [np.abs(yf)], ['FFT temperature'], 'fft_temperature.png', 'Period [days]', 'Amplitude [arb.]')
+    freq, psd = series_spectrum(data) # average spectrum of overlapping segments instead of one FFT of the whole series, see spectral.py
+    plot_spectra(freq, [psd], ['Temperature spectrum'], 'fft_temperature.png') # periods in days on log axes
 
 
 def sinx(x, amp, freq, phase, con):
@@ -81,11 +53,12 @@ def sinx(x, amp, freq, phase, con):
 def fit_with_sine(time, ydata):
     xdata = np.arange(0, time.size, 1) # make hours array with step size 1 hour
 
-    fit, pcov = curve_fit(sinx, xdata, ydata, p0 = [30, 1/(365*24), 0, 9]) # fit data with predifined sin function and initialize fitting with parameters p0, produces least squares parameters and covariance matrix
+    from sine_fit import fit_sines # imported here, sine_fit itself imports sinx from this file
+    fit = fit_sines([ydata])[0] # starts from the FFT peak and a linear scan instead of a hand-made p0, then curve_fit with the analytic Jacobian, see sine_fit.py
     fit_values = sinx(xdata, *fit) # inserts xdata array into our sinx function with fit parameters (the * operator calls each element of fit individually)
     #fit_values = sinx(xdata, *[30, 1/(365*24), np.pi, 9])
     
-    simple_plot([xdata, xdata], [ydata, fit_values], ['data', 'fit'], 'fit.png', 'Time [hours]', 'Temperature [$^\\circ$C]')
+    simple_plot([xdata, xdata], [ydata, fit_values], ['data', 'fit'], 'Time [hours]', 'Temperature [$^\\circ$C]', 'fit.png')
 
 
 if __name__ == "__main__":
@@ -0,0 +1,100 @@
+import numpy as np
+from scipy.fft import rfft, rfftfreq
+from scipy.optimize import curve_fit
+
+from fourier import sinx
+from weather_cache import load_weather, date_range
+
+
+# Fit of amp * sin(2 pi freq x + phase) + con without a hand-made starting point. For a fixed frequency
+# the model is linear, a sin(2 pi freq x) + b cos(2 pi freq x) + con with amp = sqrt(a^2 + b^2) and
+# phase = atan2(b, a), so every candidate frequency only needs a linear least squares solution.
+#   1. the FFT peak of every series gives the starting frequency,
+#   2. a grid of frequencies around the peak is scanned, all series at once with one batched solve per grid
+#      point (the normal equations are only 3x3, missing values get weight 0),
+#   3. the best grid point is refined with curve_fit() and the analytic Jacobian of sinx().
+
+
+def main():
+    time, columns = load_weather('weather_data.csv')
+    temperature = columns['CZ_temperature']
+
+    ref_times = ["1980-01-01","1990-01-01","2000-01-01","2010-01-01", "2020-01-01"]
+    labels = ['yrs \'80 - \'90','yrs \'90 - \'00','yrs \'00 - \'10','yrs \'10 - \'20']
+    decades = [temperature[date_range(time, n, m)] for n, m in zip(ref_times[:-1], ref_times[1:])]
+
+    for l, (amp, freq, phase, con) in zip(labels, fit_sines(decades)): # x is in hours, as in fit_with_sine()
+        print(f"{l}: amplitude {amp:.2f} C, period {1 / freq / 24:.2f} days, phase {phase:.2f}, offset {con:.2f} C")
+
+
+def stack_series(series):
+    # series of different lengths become columns of one array, missing values get zero weight
+    n = max(len(s) for s in series)
+    Y = np.zeros((n, len(series)))
+    W = np.zeros((n, len(series)))
+    for j, s in enumerate(series):
+        s = np.asarray(s, dtype = float)
+        valid = np.isfinite(s)
+        Y[:s.size, j] = np.where(valid, s, 0)
+        W[:s.size, j] = valid
+    return Y, W
+
+
+def fft_peak_frequency(Y, W):
+    mean = np.sum(Y * W, axis = 0) / np.sum(W, axis = 0)
+    spectrum = np.abs(rfft((Y - mean) * W, axis = 0))
+    spectrum[0] = 0 # skip the zero frequency
+    return rfftfreq(Y.shape[0], 1)[np.argmax(spectrum, axis = 0)]
+
+
+def linear_sine_fit(x, Y, W, freq):
+    # weighted least squares of a sin + b cos + con for every column j of Y at its own frequency freq[j]
+    angle = 2 * np.pi * x[:, None] * freq
+    basis = np.stack([np.sin(angle), np.cos(angle), np.ones_like(angle)]) # (3, samples, series)
+
+    G = np.einsum('isj,ksj,sj->jik', basis, basis, W) # normal matrices, one 3x3 matrix per series
+    b = np.einsum('isj,sj->ji', basis, W * Y)
+    coef = np.linalg.solve(G, b[..., None])[..., 0] # (series, 3)
+
+    residual = np.sum(W * (Y - np.einsum('isj,ji->sj', basis, coef)) ** 2, axis = 0)
+    return coef, residual
+
+
+def coefficients_to_parameters(coef, freq):
+    a, b, con = coef.T
+    return np.stack([np.hypot(a, b), freq, np.arctan2(b, a), con], axis = 1) # parameters of sinx()
+
+
+def sinx_jacobian(x, amp, freq, phase, con):
+    angle = 2 * np.pi * freq * x + phase
+    return np.stack([np.sin(angle), amp * np.cos(angle) * 2 * np.pi * x, amp * np.cos(angle), np.ones_like(x)], axis = 1)
+
+
+def fit_sines(series, n_grid = 101, width = 2, refine = True):
+    # x is the sample number; the grid covers +-width FFT bins around the peak of every series
+    Y, W = stack_series(series)
+    x = np.arange(Y.shape[0], dtype = float)
+    peak = fft_peak_frequency(Y, W)
+
+    best_residual = np.full(Y.shape[1], np.inf)
+    best = np.zeros((Y.shape[1], 4))
+    for offset in np.linspace(-width, width, n_grid):
+        freq = np.maximum(peak + offset / Y.shape[0], 1 / Y.shape[0])
+        coef, residual = linear_sine_fit(x, Y, W, freq)
+        better = residual < best_residual
+        best_residual[better] = residual[better]
+        best[better] = coefficients_to_parameters(coef, freq)[better]
+
+    if refine:
+        for j, s in enumerate(series):
+            valid = np.isfinite(np.asarray(s, dtype = float))
+            best[j], pcov = curve_fit(sinx, x[:len(s)][valid], np.asarray(s, dtype = float)[valid], p0 = best[j], jac = sinx_jacobian)
+    negative = best[:, 0] < 0 # the refinement may flip the sign of the amplitude, move it into the phase
+    best[negative, 0] *= -1
+    best[negative, 2] += np.pi
+    best[:, 2] = np.mod(best[:, 2], 2 * np.pi)
+    return best
+
+
+if __name__ == "__main__":
+    main()
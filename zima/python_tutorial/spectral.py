@@ -0,0 +1,148 @@
+import sys
+import pathlib
+import numpy as np
+from scipy.fft import rfft, rfftfreq, next_fast_len
+from scipy.signal import get_window
+
+from weather_cache import load_weather, date_range
+
+ZIMA = str(pathlib.Path(__file__).resolve().parents[1]) # the shared modules live in zima/szd
+if ZIMA not in sys.path:
+    sys.path.append(ZIMA)
+from szd.plotting import figure
+
+
+# Spectra of long time series in bounded memory. Instead of one FFT over the whole series the data are
+# cut into overlapping segments of length nperseg, every segment is detrended (mean removed), windowed
+# and transformed with a real FFT (rfft, half of the work of fft for real data). The data arrive in chunks
+# and only the last unfinished segment is carried over to the next chunk.
+#   - welch()       - average power spectral density of all segments, the same as scipy.signal.welch()
+#   - spectrogram() - power of every segment (or of groups of segments), i.e. how the spectrum drifts in time
+#   - series_spectrum() - welch() of one hourly series with segments of up to three years, the spectrum that
+#                         fourier() in fourier.py and temperature.py plot
+
+
+def main():
+    time, columns = load_weather('weather_data.csv')
+    temperature = columns['CZ_temperature']
+
+    ref_times = ["1980-01-01","1990-01-01","2000-01-01","2010-01-01", "2020-01-01"]
+    labels = ['yrs \'80 - \'90','yrs \'90 - \'00','yrs \'00 - \'10','yrs \'10 - \'20']
+    nperseg = 3 * 365 * 24 # segments of three years resolve the yearly period
+
+    spectra = []
+    for n, m in zip(ref_times[:-1], ref_times[1:]):
+        decade = temperature[date_range(time, n, m)]
+        freq, psd = welch(array_chunks(decade), fs = 24, nperseg = nperseg) # fs = 24 samples per day
+        spectra.append(psd)
+    plot_spectra(freq, spectra, labels, 'welch_temperature.png')
+
+    times, freq, power = spectrogram(array_chunks(temperature), fs = 24, nperseg = 365 * 24, average = 4)
+    plot_spectrogram(times, freq, power, 'spectrogram_temperature.png')
+
+
+def array_chunks(data, chunk_size = 1000000):
+    for start in range(0, len(data), chunk_size):
+        yield np.asarray(data[start:start + chunk_size], dtype = float)
+
+
+def fft_length(nperseg, nfft = None):
+    return nfft if nfft else next_fast_len(nperseg, real = True)
+
+
+def segment_spectra(chunks, nperseg, noverlap = None, nfft = None, window = 'hann'):
+    # yields the |rfft|^2 of the windowed segments, one 2D array (segments x frequencies) per chunk
+    noverlap = nperseg // 2 if noverlap is None else noverlap
+    step = nperseg - noverlap
+    nfft = fft_length(nperseg, nfft)
+    w = get_window(window, nperseg)
+
+    carry = np.empty(0)
+    for chunk in chunks:
+        data = np.concatenate([carry, chunk])
+        count = (data.size - nperseg) // step + 1 if data.size >= nperseg else 0
+        if count > 0:
+            segments = np.lib.stride_tricks.sliding_window_view(data, nperseg)[:count * step:step]
+            segments = (segments - segments.mean(axis = 1, keepdims = True)) * w
+            yield np.abs(rfft(segments, n = nfft, axis = 1)) ** 2
+        carry = data[count * step:] # samples of the segments that are not complete yet
+
+
+def density_scale(nperseg, nfft, fs, window):
+    # scaling of |rfft|^2 to a one-sided power spectral density
+    w = get_window(window, nperseg)
+    scale = np.full(nfft // 2 + 1, 2 / (fs * np.sum(w ** 2)))
+    scale[0] /= 2 # the zero frequency and the Nyquist frequency appear only once in a two-sided spectrum
+    if nfft % 2 == 0:
+        scale[-1] /= 2
+    return scale
+
+
+def welch(chunks, fs = 1.0, nperseg = 256, noverlap = None, nfft = None, window = 'hann'):
+    nfft = fft_length(nperseg, nfft)
+    total, count = 0, 0
+    for power in segment_spectra(chunks, nperseg, noverlap, nfft, window):
+        total = total + power.sum(axis = 0)
+        count += power.shape[0]
+    if count == 0:
+        raise ValueError(f"the series is shorter than one segment of {nperseg} samples")
+    return rfftfreq(nfft, 1 / fs), total / count * density_scale(nperseg, nfft, fs, window)
+
+
+def series_spectrum(data, fs = 24, nperseg = 3 * 365 * 24):
+    # fs = 24 samples per day, so the frequencies are in 1/day; segments of three years resolve the yearly period
+    data = np.asarray(data, dtype = float)
+    data = np.where(np.isnan(data), np.nanmean(data), data) # a missing hour would turn every segment it is in into nan
+    return welch(array_chunks(data), fs = fs, nperseg = min(nperseg, data.size))
+
+
+def spectrogram(chunks, fs = 1.0, nperseg = 256, noverlap = None, nfft = None, window = 'hann', average = 1):
+    # power spectral density of every group of 'average' neighbouring segments, times are the group centres
+    noverlap = nperseg // 2 if noverlap is None else noverlap
+    nfft = fft_length(nperseg, nfft)
+    scale = density_scale(nperseg, nfft, fs, window)
+
+    columns, counts, pending = [], [], np.empty((0, nfft // 2 + 1))
+    for power in segment_spectra(chunks, nperseg, noverlap, nfft, window):
+        pending = np.concatenate([pending, power])
+        groups = pending.shape[0] // average
+        if groups:
+            columns.append(pending[:groups * average].reshape(groups, average, -1).mean(axis = 1) * scale)
+            counts += [average] * groups
+            pending = pending[groups * average:]
+    if pending.shape[0]:
+        columns.append(pending.mean(axis = 0, keepdims = True) * scale)
+        counts.append(pending.shape[0]) # the last group may have fewer segments, its centre is earlier
+    if not columns:
+        raise ValueError(f"the series is shorter than one segment of {nperseg} samples")
+
+    power = np.concatenate(columns)
+    step = (nperseg - noverlap) / fs
+    counts = np.array(counts)
+    first = np.cumsum(counts) - counts # index of the first segment of every group
+    times = nperseg / 2 / fs + step * (first + (counts - 1) / 2)
+    return times, rfftfreq(nfft, 1 / fs), power
+
+
+def plot_spectra(freq, spectra, labels, filename = None):
+    with figure(filename) as (fig, ax):
+        for psd, l in zip(spectra, labels):
+            ax.plot(1 / freq[1:], psd[1:], label = l) # the zero frequency has no period
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel('Period [days]')
+        ax.set_ylabel('Power spectral density [$^\\circ$C$^2$ day]')
+        ax.legend()
+
+
+def plot_spectrogram(times, freq, power, filename = None):
+    with figure(filename) as (fig, ax):
+        mesh = ax.pcolormesh(times / 365.25, freq[1:], np.log10(power[:, 1:].T), shading = 'nearest', rasterized = True)
+        fig.colorbar(mesh, label = 'log$_{10}$ PSD')
+        ax.set_yscale('log')
+        ax.set_xlabel('Time [years]')
+        ax.set_ylabel('Frequency [1/day]')
+
+
+if __name__ == "__main__":
+    main()
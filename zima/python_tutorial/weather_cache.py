@@ -0,0 +1,95 @@
+import hashlib
+import json
+import pathlib
+
+import numpy as np
+
+
+# Binary cache of weather_data.csv. The csv file is parsed only once, then every column is saved as a .npy
+# file (the time as int64 nanoseconds since 1970, UTC) and later runs open them memory-mapped. The cache is
+# rebuilt when the csv file changes: a different modification time or size triggers a check of its hash.
+# The time column is sorted, so a date range is found with a binary search instead of a mask over all rows.
+
+
+def main():
+    time, columns = load_weather('weather_data.csv')
+    print(f"{time.size} rows, columns {list(columns)}")
+
+    s = date_range(time, "2010-01-01", "2020-01-01")
+    print(f"yrs '10 - '20: mean temperature {np.nanmean(columns['CZ_temperature'][s]):.2f} C")
+
+
+def load_weather(filename, time_column = 'utc_timestamp', cache_dir = None):
+    filename = pathlib.Path(filename)
+    cache_dir = pathlib.Path(cache_dir) if cache_dir else filename.with_name(filename.stem + '_cache')
+
+    if not cache_is_valid(filename, cache_dir):
+        build_cache(filename, time_column, cache_dir)
+
+    meta = json.loads((cache_dir / 'meta.json').read_text())
+    time = np.load(cache_dir / 'time.npy', mmap_mode = 'r')
+    columns = {c: np.load(cache_dir / f'{c}.npy', mmap_mode = 'r') for c in meta['columns']}
+    return time, columns
+
+
+def file_hash(filename):
+    h = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cache_is_valid(filename, cache_dir):
+    try:
+        meta = json.loads((cache_dir / 'meta.json').read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+
+    stat = filename.stat()
+    if meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size:
+        return True
+    if meta['size'] != stat.st_size or meta['sha256'] != file_hash(filename):
+        return False
+
+    # only the modification time changed (e.g. a fresh copy of the same file), remember the new one
+    meta['mtime_ns'] = stat.st_mtime_ns
+    (cache_dir / 'meta.json').write_text(json.dumps(meta))
+    return True
+
+
+def build_cache(filename, time_column, cache_dir):
+    import pandas as pd # only needed to parse the csv file, reading the cache is pure numpy
+
+    stat = filename.stat()
+    df = pd.read_csv(filename)
+    time = pd.to_datetime(df.pop(time_column), utc = True).dt.tz_localize(None)
+    time = time.to_numpy(dtype = 'datetime64[ns]').astype(np.int64)
+
+    order = np.argsort(time, kind = 'stable') # the binary search in date_range() needs sorted times
+    df = df.select_dtypes('number')
+
+    cache_dir.mkdir(exist_ok = True)
+    (cache_dir / 'meta.json').unlink(missing_ok = True) # an interrupted build leaves no valid cache behind
+    np.save(cache_dir / 'time.npy', time[order])
+    for c in df.columns:
+        np.save(cache_dir / f'{c}.npy', df[c].to_numpy(dtype = float)[order])
+
+    meta = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': file_hash(filename), 'columns': list(df.columns)}
+    (cache_dir / 'meta.json').write_text(json.dumps(meta))
+
+
+def date_range(time, start, end):
+    # slice of the rows with start <= time < end, the dates can be anything numpy.datetime64 understands
+    bounds = np.array([start, end], dtype = 'datetime64[ns]').astype(np.int64)
+    first, last = np.searchsorted(time, bounds)
+    return slice(first, last)
+
+
+def to_datetime(time):
+    import pandas as pd
+    return pd.to_datetime(np.asarray(time), unit = 'ns')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+# Code shared by the scripts in zima/. The scripts are run from their own directories, so they put
+# zima/ on sys.path (once, a module may be imported from several places) before importing from here:
+#
+#     ZIMA = str(pathlib.Path(__file__).resolve().parents[1]) # the shared modules live in zima/szd
+#     if ZIMA not in sys.path:
+#         sys.path.append(ZIMA)
+#     from szd.plotting import simple_plot
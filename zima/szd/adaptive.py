@@ -0,0 +1,129 @@
+import sys
+import pathlib
+import numpy as np
+
+ZIMA = str(pathlib.Path(__file__).resolve().parents[1]) # so that it also runs as a script
+if ZIMA not in sys.path:
+    sys.path.append(ZIMA)
+from szd.paths import use
+
+
+# Monte Carlo with a given precision instead of a given number of samples. The samples are drawn in
+# batches and after every batch the estimate and its standard error are updated. The run stops when the
+# standard error drops below the tolerance or when the budget of samples is spent. The size of the next
+# batch follows from the 1/sqrt(n) scaling of the error (capped at 'growth' times the samples so far),
+# so an easy question needs a few small batches and a hard one gets there in a few large ones.
+# A target is a dict of three functions that keep the statistics in a small state dict:
+#   new_state()            - empty state,
+#   add(state, size, rng)  - draw 'size' samples and add them to the state,
+#   estimate(state)        - (value, standard error).
+# Targets:
+#   safe_distance_target() - radius with the probability 'prob' of an apple falling further (newton.py),
+#   balance_target()       - mean final balance of a betting strategy, error std/sqrt(n) (DAlembert.py),
+#   switch_target()        - probability that switching the door wins, error sqrt(p(1-p)/n) (dvere_finished.py).
+
+
+def main():
+    for target, tolerance in [(safe_distance_target(), 0.01), (balance_target('dalembert'), 0.5), (switch_target(), 1e-3)]:
+        print_result(sequential(target, tolerance, seed = 1))
+
+
+def sequential(target, tolerance, budget = 10**8, batch_size = 10000, min_batches = 4, growth = 4, seed = None):
+    rng = np.random.default_rng(seed)
+    state = target['new_state']()
+    samples, batches, size = 0, 0, batch_size
+    while True:
+        size = min(size, budget - samples)
+        target['add'](state, size, rng)
+        samples += size
+        batches += 1
+        value, error = target['estimate'](state)
+
+        converged = batches >= min_batches and error <= tolerance # a few batches first, the first errors are noisy
+        if converged or samples >= budget:
+            break
+        needed = samples * (error / tolerance) ** 2 if error > 0 else samples # the error falls as 1/sqrt(n)
+        size = int(np.clip(needed - samples, batch_size, growth * samples))
+
+    return {'name': target['name'], 'value': value, 'error': error, 'tolerance': tolerance,
+            'samples': samples, 'batches': batches, 'converged': converged}
+
+
+def print_result(result):
+    status = "" if result['converged'] else f", budget spent before reaching {result['tolerance']:.3g}"
+    print(f"{result['name']}: {result['value']:.5g} +- {result['error']:.2g} from {result['samples']} samples in {result['batches']} batches{status}")
+
+
+def safe_distance_target(sigma = 1.5, prob = 0.002, bins = 20000, z = 1.96):
+    # the quantile is read from a fine histogram with fixed edges, so the memory does not grow with n;
+    # its error comes from the distribution free interval of a quantile: the ranks n q +- z sqrt(n q (1 - q))
+    edges = np.linspace(0, 10 * sigma, bins + 1) # P(r > 10 sigma) = exp(-50), every apple is inside
+    q = 1 - prob
+
+    def new_state():
+        return {'hist': np.zeros(bins, dtype = np.int64), 'n': 0}
+
+    def add(state, size, rng):
+        apples = rng.normal(0, sigma, [2, size])
+        state['hist'] += np.histogram((apples[0]**2 + apples[1]**2)**0.5, bins = edges)[0]
+        state['n'] += size
+
+    def estimate(state):
+        n = state['n']
+        cumulative = np.concatenate([[0], np.cumsum(state['hist'])]) / n
+        s = np.sqrt(q * (1 - q) / n)
+        low, value, high = np.interp([max(q - z * s, 0), q, min(q + z * s, 1)], cumulative, edges)
+        return value, (high - low) / (2 * z)
+
+    return {'name': f'safe distance (p = {prob})', 'new_state': new_state, 'add': add, 'estimate': estimate}
+
+
+def balance_target(strategy = 'dalembert', initial_balance = 200, base_bet = 20, rounds = 20, bet_change = 5):
+    use('dalembert')
+    from dalembert_batch import d_alembert_batch, always_bet_the_same_batch, random_bet_change_batch
+    play = {
+        'dalembert': lambda size, rng: d_alembert_batch(size, initial_balance, base_bet, rounds, bet_change, rng),
+        'same': lambda size, rng: always_bet_the_same_batch(size, initial_balance, base_bet, rounds, rng),
+        'random': lambda size, rng: random_bet_change_batch(size, initial_balance, base_bet, rounds, bet_change, rng),
+    }[strategy]
+
+    def new_state():
+        return {'n': 0, 'mean': 0.0, 'M2': 0.0}
+
+    def add(state, size, rng):
+        # merge of the batch mean and variance into the running ones (Chan et al., as in correlation_stream.py)
+        balance = play(size, rng).astype(float)
+        mean, M2 = balance.mean(), ((balance - balance.mean()) ** 2).sum()
+        n = state['n'] + size
+        delta = mean - state['mean']
+        state['M2'] += M2 + delta ** 2 * state['n'] * size / n
+        state['mean'] += delta * size / n
+        state['n'] = n
+
+    def estimate(state):
+        return state['mean'], np.sqrt(state['M2'] / (state['n'] - 1) / state['n'])
+
+    return {'name': f'mean final balance ({strategy})', 'new_state': new_state, 'add': add, 'estimate': estimate}
+
+
+def switch_target(nDoors = 3, nOpened = 1):
+    use('problem tri dveri')
+    from dvere_vectorized import simulate_doors
+
+    def new_state():
+        return {'n': 0, 'wins': 0}
+
+    def add(state, size, rng):
+        oldSelectionCorrect, newSelectionCorrect = simulate_doors(size, nDoors, nOpened, rng)
+        state['wins'] += int(newSelectionCorrect.sum())
+        state['n'] += size
+
+    def estimate(state):
+        p = state['wins'] / state['n']
+        return p, np.sqrt(max(p * (1 - p), 1 / state['n']) / state['n']) # the floor keeps p = 0 or 1 from claiming zero error
+
+    return {'name': f'switch win rate ({nDoors} doors, {nOpened} opened)', 'new_state': new_state, 'add': add, 'estimate': estimate}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import datetime
+import json
+import pathlib
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+
+
+# Small benchmark harness in the spirit of asv. A benchmark is a function and a setup that builds its
+# arguments for a given input size; every size is timed a few times and run once more under tracemalloc
+# for the peak memory. Results go to a JSON history (one entry per run) and can be compared to a baseline.
+
+MEMORY_SLACK = 64 * 2**10 # bytes, small peaks vary with the allocator more than any tolerance
+
+
+def benchmark(name, func, setup, sizes, unit, items = None):
+    # items(size) is the number of games/points/samples processed in one call, for the throughput
+    return {'name': name, 'func': func, 'setup': setup, 'sizes': sizes, 'unit': unit, 'items': items or (lambda size: size)}
+
+
+def measure(func, args, repeat = 3):
+    times = []
+    for r in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start() # numpy reports its array allocations to tracemalloc as well
+    try:
+        func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'time_min': min(times), 'time_median': statistics.median(times), 'peak_memory': peak}
+
+
+def run(benchmarks, repeat = 3, quick = False, select = None):
+    results = {}
+    for b in benchmarks:
+        if select and select not in b['name']:
+            continue
+        for size in b['sizes'][:1] if quick else b['sizes']:
+            args = b['setup'](size)
+            r = measure(b['func'], args, repeat)
+            r['throughput'] = b['items'](size) / r['time_min']
+            r['unit'] = b['unit']
+            key = f"{b['name']}[{size}]"
+            results[key] = r
+            print(f"{key:<45} {r['time_min']*1e3:10.2f} ms {r['throughput']:12.4g} {b['unit']}/s {r['peak_memory']/2**20:9.2f} MiB")
+    return results
+
+
+def git_revision(path):
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd = path, capture_output = True, text = True).stdout.strip()
+    except OSError:
+        return ''
+
+
+def append_history(fName, results):
+    fName = pathlib.Path(fName)
+    history = json.loads(fName.read_text()) if fName.exists() else []
+    history.append({'date': datetime.datetime.now().isoformat(timespec = 'seconds'), 'revision': git_revision(fName.parent),
+                    'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.node(), 'results': results})
+    fName.write_text(json.dumps(history, indent = 1))
+
+
+def compare(results, baseline, tolerance = 0.2, memory_tolerance = 0.2):
+    # (key, 'time_min' or 'peak_memory', baseline, now) of the benchmarks slower than the baseline by more
+    # than 'tolerance' (0.2 = 20 %) or with a peak memory larger by more than 'memory_tolerance'
+    regressions = []
+    for key, r in results.items():
+        if key not in baseline:
+            continue
+        old = baseline[key]
+        if r['time_min'] > old['time_min'] * (1 + tolerance):
+            regressions.append((key, 'time_min', old['time_min'], r['time_min']))
+        if 'peak_memory' in old and r['peak_memory'] > old['peak_memory'] * (1 + memory_tolerance) + MEMORY_SLACK:
+            regressions.append((key, 'peak_memory', old['peak_memory'], r['peak_memory']))
+    return regressions
@@ -0,0 +1,331 @@
+import argparse
+import os
+import pathlib
+import sys
+
+import numpy as np
+
+
+# One command line for the scripts in zima/:
+#   python zima newton --apples 1e6 --sigma 2 --no-plot
+#   python zima --profile dalembert --games 100000
+#   python zima doors --tolerance 1e-4        # as many games as the precision needs
+# Every parameter that the main() of a script has hard-coded is a flag here, with the same default.
+# Only numpy is imported at start, matplotlib, pandas and scipy are imported by the stages that need
+# them (plots, FFT, fits), so a run with --no-plot starts about as fast as numpy itself.
+# The simulations use the vectorised modules next to the scripts, their results are the same.
+
+ZIMA = pathlib.Path(__file__).resolve().parents[1]
+if str(ZIMA) not in sys.path: # also when run as python szd/cli.py
+    sys.path.append(str(ZIMA))
+from szd.paths import use
+
+
+def main(argv = None):
+    from szd.profiling import add_arguments, session_from_args
+
+    parser = argparse.ArgumentParser(prog = "zima", description = "Simulations and analyses of the SZD seminar")
+    parser.add_argument("--batch", action = "store_true", help = "never open a window, only save the figures")
+    parser.add_argument("--cache", action = "store_true", help = "reuse the results of earlier runs with the same parameters and --seed (see szd/mc_cache.py)")
+    add_arguments(parser)
+    commands = parser.add_subparsers(dest = "command", required = True)
+
+    p = commands.add_parser("newton", help = "apples falling from Newton's tree (newton.py)")
+    p.add_argument("--apples", type = float, default = 50000, help = "number of apples")
+    p.add_argument("--sigma", type = float, default = 1.5, help = "spread of the apples around the tree [m]")
+    p.add_argument("--bins", type = int, default = 500, help = "bins of the radial histogram")
+    p.add_argument("--prob", type = float, default = 0.002, help = "acceptable probability of being hit")
+    p.add_argument("--radius", type = float, default = 0.5, help = "radius of the head [m]")
+    p.add_argument("--sample-size", type = float, default = 1)
+    p.add_argument("--y-max", type = float, default = 8, help = "last position of the head [m]")
+    p.add_argument("--y-step", type = float, default = 0.02, help = "step of the head position [m]")
+    p.add_argument("--seed", type = int, default = None)
+    p.add_argument("--tolerance", type = float, default = None, help = "draw samples until the standard error of the safe distance is below this (see szd/adaptive.py)")
+    p.add_argument("--budget", type = float, default = 1e8, help = "most samples drawn with --tolerance")
+    p.add_argument("--no-plot", action = "store_true")
+    p.set_defaults(run = newton)
+
+    p = commands.add_parser("dalembert", help = "betting strategies (DAlembert.py)")
+    p.add_argument("--initial-balance", type = int, default = 200)
+    p.add_argument("--base-bet", type = int, default = 20)
+    p.add_argument("--bet-change", type = int, default = 5)
+    p.add_argument("--rounds", type = int, default = 20)
+    p.add_argument("--games", type = float, default = 1000, help = "number of simulated games")
+    p.add_argument("--seed", type = int, default = None)
+    p.add_argument("--tolerance", type = float, default = None, help = "draw samples until the standard error of the mean final balance is below this (see szd/adaptive.py)")
+    p.add_argument("--budget", type = float, default = 1e8, help = "most samples drawn with --tolerance")
+    p.add_argument("--trajectories", nargs = "?", const = "", default = None, metavar = "DIR",
+                   help = "ruin time and drawdown of whole games, with DIR the games are also stored there (see dalembert/dalembert_trajectories.py)")
+    p.add_argument("--no-plot", action = "store_true")
+    p.set_defaults(run = dalembert)
+
+    p = commands.add_parser("doors", help = "Monty Hall problem (dvere_finished.py)")
+    p.add_argument("--iterations", type = float, default = 1e3, help = "number of games")
+    p.add_argument("--doors", type = int, default = 3)
+    p.add_argument("--opened", type = int, default = 1, help = "doors opened by the host")
+    p.add_argument("--points", type = int, default = 200, help = "points of the convergence plot")
+    p.add_argument("--seed", type = int, default = None)
+    p.add_argument("--tolerance", type = float, default = None, help = "draw samples until the standard error of the switch win rate is below this (see szd/adaptive.py)")
+    p.add_argument("--budget", type = float, default = 1e8, help = "most samples drawn with --tolerance")
+    p.add_argument("--no-plot", action = "store_true")
+    p.set_defaults(run = doors)
+
+    p = commands.add_parser("correlation", help = "ice cream sales and temperature (correlation.py)")
+    p.add_argument("--file", type = pathlib.Path, default = ZIMA / 'Correlation' / 'korelace.txt', help = "two tab separated columns: temperature, profit")
+    p.add_argument("--no-plot", action = "store_true")
+    p.set_defaults(run = correlation)
+
+    p = commands.add_parser("temperature", help = "temperature in the Czech Republic by decades (temperature.py)")
+    p.add_argument("--file", type = pathlib.Path, default = ZIMA / 'python_tutorial' / 'weather_data.csv')
+    p.add_argument("--column", default = 'CZ_temperature')
+    p.add_argument("--ref-times", nargs = "+", default = ["1980-01-01", "1990-01-01", "2000-01-01", "2010-01-01", "2020-01-01"], help = "borders of the periods")
+    p.add_argument("--no-plot", action = "store_true", help = "only print the mean of every period, no plots and no spectrum")
+    p.set_defaults(run = temperature)
+
+    p = commands.add_parser("fourier", help = "2D histogram of two Gaussians, or spectrum and sine fit of the weather data (fourier.py)")
+    p.add_argument("--size", type = int, nargs = 2, default = [5000, 1000], help = "points of the two Gaussians")
+    p.add_argument("--mean", type = float, nargs = 2, default = [6, 5])
+    p.add_argument("--sigma", type = float, nargs = 2, default = [0.5, 0.3])
+    p.add_argument("--bins", type = int, default = 20)
+    p.add_argument("--seed", type = int, default = None)
+    p.add_argument("--weather", type = pathlib.Path, default = None, help = "weather_data.csv, runs fourier() and fit_with_sine() instead")
+    p.add_argument("--column", default = 'CZ_temperature')
+    p.add_argument("--no-plot", action = "store_true")
+    p.set_defaults(run = fourier)
+
+    p = commands.add_parser("groceries", help = "price of a shopping list (groceries.py)")
+    p.add_argument("--file", type = pathlib.Path, default = ZIMA / 'python_tutorial' / 'novy_nakup.csv')
+    p.set_defaults(run = groceries)
+
+    args = parser.parse_args(argv)
+    if args.command == 'doors' and args.doors < 2:
+        parser.error(f"--doors must be at least 2, not {args.doors}")
+    if args.command == 'doors' and not 0 <= args.opened <= args.doors - 2:
+        parser.error(f"the host can open 0 to {args.doors - 2} of {args.doors} doors, not --opened {args.opened}")
+    if args.batch:
+        os.environ['SZD_BATCH'] = '1' # read by szd.plotting when it is imported
+        os.environ['MPLBACKEND'] = 'Agg'
+    if args.cache:
+        from szd.mc_cache import enable
+        enable()
+        if getattr(args, 'seed', None) is None:
+            print("--cache only reuses runs with a --seed, this run is not cached")
+    with session_from_args(args):
+        args.run(args)
+
+
+def newton(args):
+    from szd.profiling import stage
+    use('Newton')
+    from apple_grid import catch_apple_grid, catch_apple_seeded
+    from safe_distance import find_safe_distances
+
+    if args.tolerance:
+        from szd.adaptive import sequential, safe_distance_target, print_result
+        print_result(sequential(safe_distance_target(args.sigma, args.prob), args.tolerance, int(args.budget), seed = args.seed))
+        return
+
+    with stage('rng'):
+        apples = np.random.default_rng(args.seed).normal(0, args.sigma, [2, int(args.apples)])
+    with stage('histogram'):
+        dist = (apples[0]**2 + apples[1]**2)**0.5
+        hist, edges = np.histogram(dist, bins = args.bins)
+    safe_zone = find_safe_distances(hist, edges, apples.shape[1], args.prob) # same result as find_safe_distance() in newton.py
+    with stage('catch_apple'):
+        y0 = np.arange(0, args.y_max, args.y_step)
+        if args.seed is None:
+            y0, probabilities = catch_apple_grid(apples, args.radius, args.sample_size, y0)
+        else: # the same apples drawn again from the seed, this call can be cached
+            y0, probabilities = catch_apple_seeded(apples.shape[1], args.sigma, args.radius, args.sample_size, y0, args.seed)
+    probabilities = np.array(probabilities)
+    safe = np.where(probabilities <= args.prob)[0]
+    safe_y0 = y0[safe[0]] if safe.size else np.nan
+
+    print(f"{apples.shape[1]} apples, safe distance {safe_zone:.3f} m")
+    print(f"injury probability below {args.prob} from {safe_y0:.2f} m")
+    if args.no_plot:
+        return
+
+    with stage('plot'):
+        from szd.plotting import simple_plot, plot_histogram
+        simple_plot([apples[0]], [apples[1]], ['Fallen apples'], None, None, "fallen_apples.png", kind = 'points')
+        plot_histogram(hist, edges, None, 'Radial distance', f'Fallen apples / {np.round(edges[1] - edges[0], 3)} m', safe_zone, "fallen_apples_hist.png")
+        plot_histogram(probabilities, np.append(y0, y0[-1] + args.y_step), None, 'Point of origin [m]', 'Injury probability', safe_y0, 'fallen_apples_finite_area.png')
+
+
+def dalembert(args):
+    from szd.profiling import stage
+    use('dalembert')
+    from dalembert_batch import d_alembert_batch, always_bet_the_same_batch, random_bet_change_batch
+
+    games = int(args.games)
+    seeds = np.random.SeedSequence(args.seed).spawn(3) if args.seed is not None else [None] * 3 # a seed per strategy, so each result can be cached
+    if args.tolerance:
+        from szd.adaptive import sequential, balance_target, print_result
+        for strategy, seed in zip(['dalembert', 'same', 'random'], seeds):
+            target = balance_target(strategy, args.initial_balance, args.base_bet, args.rounds, args.bet_change)
+            print_result(sequential(target, args.tolerance, int(args.budget), seed = seed))
+        return
+    if args.trajectories is not None:
+        from dalembert_trajectories import STRATEGIES, record_trajectories, trajectory_statistics, print_statistics, plot_statistics
+        results = {}
+        with stage('games'):
+            for (strategy, name), seed in zip(STRATEGIES.items(), seeds):
+                if args.trajectories:
+                    directory = pathlib.Path(args.trajectories) / strategy
+                    results[name] = record_trajectories(strategy, games, args.initial_balance, args.base_bet, args.rounds, args.bet_change, seed, directory)['statistics']
+                else:
+                    results[name] = trajectory_statistics(strategy, games, args.initial_balance, args.base_bet, args.rounds, args.bet_change, seed)
+        for name, statistics in results.items():
+            print_statistics(name, statistics)
+        if not args.no_plot:
+            with stage('plot'):
+                plot_statistics(results)
+        return
+    with stage('games'):
+        results = {
+            "D'Alembert": d_alembert_batch(games, args.initial_balance, args.base_bet, args.rounds, args.bet_change, seeds[0]),
+            "Constant bet": always_bet_the_same_batch(games, args.initial_balance, args.base_bet, args.rounds, seeds[1]),
+            "Random bet": random_bet_change_batch(games, args.initial_balance, args.base_bet, args.rounds, args.bet_change, seeds[2]),
+        }
+    for name, balance in results.items():
+        print(f"{name:<13} mean {np.mean(balance):8.2f} +- {np.std(balance) / np.sqrt(games):.2f}")
+    if args.no_plot:
+        return
+
+    with stage('plot'):
+        from DAlembert import plot
+        plot(*results.values(), args.initial_balance)
+
+
+def doors(args):
+    from szd.profiling import stage
+    use('problem tri dveri')
+    from dvere_convergence import track_convergence, plotConvergence
+
+    if args.tolerance:
+        from szd.adaptive import sequential, switch_target, print_result
+        print_result(sequential(switch_target(args.doors, args.opened), args.tolerance, int(args.budget), seed = args.seed))
+        return
+
+    nIter = int(args.iterations)
+    with stage('games'):
+        record = track_convergence(nIter, args.doors, args.opened, args.points, args.seed)
+    print(f"Number of iterations: {nIter}")
+    print(f"Original selection correct: {record['old'][-1]} ({record['old'][-1]/nIter:.4f})")
+    print(f"New selection correct: {record['new'][-1]} ({record['new'][-1]/nIter:.4f})")
+    if args.no_plot:
+        return
+
+    with stage('plot'):
+        fName = plotConvergence(record)
+    print(f"Saved plot as {fName.resolve()}")
+
+
+def correlation(args):
+    from szd.profiling import stage
+    use('Correlation')
+    from correlation_stream import pearson_matrix
+    from correlation_rank import rank_column, kendall_tau
+
+    temperature, profit = np.loadtxt(args.file, delimiter = '\t', unpack = True)
+    with stage('correlation'):
+        pearson = pearson_matrix(np.column_stack([temperature, profit]))[0, 1]
+        spearman = spearman_min_ranks(temperature, profit)
+        tie_corrected = pearson_matrix(np.column_stack([rank_column(temperature), rank_column(profit)]))[0, 1]
+        kendall = kendall_tau(temperature, profit)
+    print("pearson coefficient = ", pearson)
+    print("spearman coefficient = ", spearman)
+    print("spearman, tie-corrected (pearson of average ranks) = ", tie_corrected)
+    print("kendall tau-b = ", kendall)
+    if args.no_plot:
+        return
+
+    with stage('plot'):
+        from szd.plotting import simple_plot
+        simple_plot([temperature], [profit], [None], 'Outside temperature [$^\\circ$C]', 'Profit [CZK]', 'ice_cream_profit.png', kind = 'points')
+
+
+def spearman_min_ranks(x, y):
+    # spearman_corr() of correlation.py without pandas: 'min' ranks and 1 - 6 sum d^2 / (n (n^2 - 1))
+    rank_x = np.searchsorted(np.sort(x), x, side = 'left') + 1
+    rank_y = np.searchsorted(np.sort(y), y, side = 'left') + 1
+    n = x.size
+    return 1 - 6 * np.sum((rank_x - rank_y) ** 2) / (n * (n ** 2 - 1))
+
+
+def temperature(args):
+    from szd.profiling import stage
+    use('python_tutorial')
+    from weather_cache import load_weather, date_range
+
+    with stage('load'):
+        time, columns = load_weather(args.file) # numpy only once the cache exists
+        data = columns[args.column]
+    periods = [date_range(time, n, m) for n, m in zip(args.ref_times[:-1], args.ref_times[1:])]
+    labels = [f"{n[:4]} - {m[:4]}" for n, m in zip(args.ref_times[:-1], args.ref_times[1:])]
+    for l, p in zip(labels, periods):
+        print(f"{l}: mean {np.nanmean(data[p]):.2f}")
+    if args.no_plot:
+        return
+
+    with stage('plot'):
+        from weather_cache import to_datetime
+        from szd.plotting import simple_plot
+        simple_plot([to_datetime(time[p]) for p in periods], [data[p] for p in periods], labels, 'Date', 'Temperature [$^\\circ$C]', 'temperature.png')
+    with stage('spectrum'):
+        import temperature as script
+        script.fourier(time, np.asarray(data))
+
+
+def fourier(args):
+    from szd.profiling import stage
+    use('python_tutorial')
+
+    if args.weather:
+        from weather_cache import load_weather
+        import fourier as script # pandas, scipy and matplotlib
+        time, columns = load_weather(args.weather)
+        data = np.asarray(columns[args.column])
+        with stage('spectrum'):
+            script.fourier(time, data)
+        with stage('fit'):
+            script.fit_with_sine(time, data)
+        return
+
+    rng = np.random.default_rng(args.seed)
+    gaus1 = rng.normal(args.mean[0], args.sigma[0], [2, args.size[0]])
+    gaus2 = rng.normal(args.mean[1], args.sigma[1], [2, args.size[1]])
+    with stage('histogram'):
+        hist1, xedges, yedges = np.histogram2d(*gaus1, bins = [args.bins, args.bins])
+        hist2, xedges, yedges = np.histogram2d(*gaus2, bins = [xedges, yedges])
+        hist = hist1 + hist2
+    i, j = np.unravel_index(np.argmax(hist), hist.shape)
+    print(f"{int(hist.sum())} points, fullest bin at x = {xedges[i]:.2f}, y = {yedges[j]:.2f} with {int(hist[i, j])} points")
+    if args.no_plot:
+        return
+
+    with stage('plot'):
+        from szd.plotting import plot_histogram2d
+        plot_histogram2d(hist, xedges, yedges, 'x label', 'y label', '2d_histogram.png')
+
+
+def groceries(args):
+    import csv # pandas takes longer to import than this whole command takes to run
+
+    with open(args.file, newline = '') as f:
+        rows = list(csv.DictReader(f, delimiter = '\t'))
+    total = sum(number(r['mnozstvi']) * number(r['cena_za_jednotku']) for r in rows)
+    print([r['polozka'] for r in rows], total)
+
+
+def number(text):
+    # integers stay integers, as in the pandas columns of groceries.py
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+if __name__ == "__main__":
+    main()
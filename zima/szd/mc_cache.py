@@ -0,0 +1,246 @@
+import contextlib
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+
+
+# Disk cache of the results of the simulations. A call is looked up by the hash of
+#   - the name of the function,
+#   - all its arguments after the defaults are filled in (arrays by the hash of their data),
+#   - the source code of the files it depends on, so a changed simulation never returns old results.
+# Only reproducible calls are cached: a seed (or rng) argument that is None or a running Generator
+# means new random numbers on every call, such calls always run, and so do functions without a seed
+# argument (a function of the drawn samples is cached through the seeded function that draws them).
+# Every result is one compressed .npz file. It is written to a temporary file and renamed, so other
+# processes see either no file or the complete one. When the cache grows over MAX_BYTES, the results
+# that were not used for the longest time are removed first, the removal runs under a lock file.
+# The cache is off unless SZD_CACHE=1 is set or enable() is called (python zima --cache ...).
+
+ENABLED = os.environ.get('SZD_CACHE', '0') != '0'
+CACHE_DIR = pathlib.Path(os.environ.get('SZD_CACHE_DIR', pathlib.Path(__file__).resolve().parents[1] / '.mc_cache'))
+MAX_BYTES = int(float(os.environ.get('SZD_CACHE_SIZE', 512 * 2**20)))
+SEED_ARGUMENTS = ('rng', 'seed', 'seed_sequence')
+STALE_LOCK = 60 # seconds, a lock this old was left behind by a killed process
+
+
+class Uncacheable(Exception):
+    pass
+
+
+def enable(enabled = True, directory = None, max_bytes = None):
+    global ENABLED, CACHE_DIR, MAX_BYTES
+    ENABLED = enabled
+    if directory:
+        CACHE_DIR = pathlib.Path(directory)
+    if max_bytes:
+        MAX_BYTES = int(max_bytes)
+
+
+def cached(depends = ()):
+    # depends: other functions or modules whose code changes the result
+    def decorator(func):
+        signature = inspect.signature(func)
+        version = []
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            if not version:
+                version.append(code_version([func, *depends]))
+            try:
+                key = call_key(func, signature.bind(*args, **kwargs), version[0])
+            except Uncacheable:
+                return func(*args, **kwargs)
+
+            result = load(key)
+            if result is None:
+                result = func(*args, **kwargs)
+                store(key, result)
+            return result
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+
+def code_version(objects):
+    h = hashlib.sha256()
+    for path in sorted({inspect.getsourcefile(inspect.unwrap(o)) for o in objects}):
+        h.update(pathlib.Path(path).read_bytes())
+    return h.hexdigest()
+
+
+def call_key(func, bound, version):
+    bound.apply_defaults()
+    if not any(name in bound.arguments for name in SEED_ARGUMENTS):
+        raise Uncacheable("no seed argument") # e.g. a function of an array of samples, the key would hash the whole array and hardly ever match again
+    for name in SEED_ARGUMENTS:
+        if name in bound.arguments and bound.arguments[name] is None:
+            raise Uncacheable(f"{name} is None")
+    description = {'function': f'{func.__module__}.{func.__qualname__}', 'code': version,
+                   'arguments': {name: describe(value) for name, value in bound.arguments.items()}}
+    return f"{func.__name__}-{hashlib.sha256(json.dumps(description, sort_keys = True).encode()).hexdigest()[:32]}"
+
+
+def describe(value):
+    # JSON description of an argument that changes whenever the argument does
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        data = np.ascontiguousarray(value)
+        return {'array': hashlib.sha256(data.view(np.uint8).reshape(-1)).hexdigest(), 'shape': data.shape, 'dtype': data.dtype.str}
+    if isinstance(value, (list, tuple)):
+        return [describe(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): describe(v) for k, v in value.items()}
+    if isinstance(value, np.random.SeedSequence):
+        return {'entropy': str(value.entropy), 'spawn_key': list(value.spawn_key), 'pool_size': value.pool_size}
+    raise Uncacheable(f"cannot describe {type(value).__name__}") # e.g. a Generator, its state changes with every draw
+
+
+def pack(result):
+    # npz keeps only arrays, the nesting of tuples, lists and dicts goes to a JSON 'structure' entry;
+    # boolean arrays (e.g. the outcome of every game) are stored as packed bits
+    arrays = {}
+    def encode(value):
+        if isinstance(value, dict):
+            return {'dict': {k: encode(v) for k, v in value.items()}}
+        if isinstance(value, tuple):
+            return {'tuple': [encode(v) for v in value]}
+        if isinstance(value, np.ndarray) and value.dtype == bool:
+            name = f'a{len(arrays)}'
+            arrays[name] = np.packbits(value, axis = None) # 8 outcomes per byte, zlib gains little on random bits
+            return {'bits': name, 'shape': list(value.shape)}
+        if isinstance(value, (list, np.ndarray)):
+            name = f'a{len(arrays)}'
+            arrays[name] = np.asarray(value)
+            return {'list' if isinstance(value, list) else 'array': name}
+        if isinstance(value, np.generic):
+            value = value.item()
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return {'value': value}
+        raise Uncacheable(f"cannot store {type(value).__name__}")
+    arrays['structure'] = np.array(json.dumps(encode(result)))
+    return arrays
+
+
+def unpack(arrays):
+    def decode(node):
+        if 'bits' in node:
+            shape = tuple(node['shape'])
+            return np.unpackbits(arrays[node['bits']], count = int(np.prod(shape))).reshape(shape).astype(bool)
+        kind, value = next(iter(node.items()))
+        if kind == 'dict':
+            return {k: decode(v) for k, v in value.items()}
+        if kind == 'tuple':
+            return tuple(decode(v) for v in value)
+        if kind == 'list':
+            return arrays[value].tolist()
+        if kind == 'array':
+            return arrays[value]
+        return value
+    return decode(json.loads(str(arrays['structure'])))
+
+
+def load(key):
+    path = CACHE_DIR / f'{key}.npz'
+    try:
+        with np.load(path) as f:
+            result = unpack({name: f[name] for name in f.files})
+        os.utime(path) # the modification time is the last use, for the eviction
+        return result
+    except (FileNotFoundError, zipfile.BadZipFile, KeyError, ValueError, OSError): # missing, removed meanwhile or broken
+        return None
+
+
+def store(key, result):
+    try:
+        arrays = pack(result)
+    except Uncacheable:
+        return
+    CACHE_DIR.mkdir(parents = True, exist_ok = True)
+    fd, tmp = tempfile.mkstemp(dir = CACHE_DIR, prefix = f'.{key}.', suffix = '.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, CACHE_DIR / f'{key}.npz')
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
+    evict()
+
+
+def evict(max_bytes = None):
+    # removes the least recently used results until the cache fits into max_bytes
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    with locked(CACHE_DIR):
+        files = []
+        for path in CACHE_DIR.glob('*.npz'):
+            with contextlib.suppress(FileNotFoundError):
+                stat = path.stat()
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for mtime, size, path in files)
+        for mtime, size, path in sorted(files):
+            if total <= max_bytes:
+                break
+            with contextlib.suppress(FileNotFoundError, PermissionError): # another process may still read it (Windows)
+                path.unlink()
+                total -= size
+
+
+@contextlib.contextmanager
+def locked(directory, timeout = 30):
+    # a lock file created with O_EXCL works on every system and file system
+    lock = pathlib.Path(directory) / '.lock'
+    start = time.monotonic()
+    while True:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            with contextlib.suppress(FileNotFoundError):
+                if time.time() - lock.stat().st_mtime > STALE_LOCK:
+                    lock.unlink()
+                    continue
+            if time.monotonic() - start > timeout:
+                raise TimeoutError(f"{lock} is held by another process")
+            time.sleep(0.01)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        with contextlib.suppress(FileNotFoundError):
+            lock.unlink()
+
+
+def clear():
+    if not CACHE_DIR.exists():
+        return
+    with locked(CACHE_DIR):
+        for path in CACHE_DIR.glob('*.npz'):
+            with contextlib.suppress(FileNotFoundError):
+                path.unlink()
+
+
+def main():
+    # python szd/mc_cache.py [clear]
+    if sys.argv[1:] == ['clear']:
+        clear()
+    files = list(CACHE_DIR.glob('*.npz'))
+    print(f"{CACHE_DIR}: {len(files)} results, {sum(f.stat().st_size for f in files) / 2**20:.2f} MiB of {MAX_BYTES / 2**20:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+import sys
+import pathlib
+
+
+# Where the scripts live. The scripts import their neighbours by bare name, so code that runs a script
+# from another directory (the command line, adaptive sampling, the benchmarks) puts its directory on sys.path.
+
+ZIMA = pathlib.Path(__file__).resolve().parents[1]
+
+
+def use(directory):
+    path = str(ZIMA / directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
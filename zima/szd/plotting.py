@@ -0,0 +1,129 @@
+import contextlib
+import os
+
+import numpy as np
+import matplotlib
+from matplotlib.colors import LogNorm
+
+if os.environ.get('SZD_BATCH', '0') != '0': # nightly runs set SZD_BATCH=1, no window is ever opened
+    matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+
+# Plotting functions shared by the scripts in zima/.
+#   - every figure is drawn inside figure(), which applies the common style without touching the global
+#     plt.rcParams, saves the image, shows it only in interactive mode and closes it afterwards,
+#   - a figure with a name is kept and cleared for the next plot of the same name instead of a new one,
+#   - datasets with more than DENSITY_THRESHOLD points are drawn as a 2D histogram (scatter plots)
+#     or reduced to the minimum and maximum of every pixel column (line plots).
+
+STYLE = {'font.size': 14}
+DENSITY_THRESHOLD = 20000
+LINE_POINTS = 4000 # about twice the width of the saved image in pixels
+FIGURES = {}
+BATCH = os.environ.get('SZD_BATCH', '0') != '0'
+
+
+def batch_mode(enabled = True):
+    global BATCH
+    BATCH = enabled
+    if enabled:
+        plt.switch_backend('Agg')
+
+
+@contextlib.contextmanager
+def figure(filename = None, name = None, figsize = (8, 6), dpi = None):
+    with plt.rc_context(STYLE):
+        if name in FIGURES and plt.fignum_exists(FIGURES[name].number):
+            fig = FIGURES[name]
+            fig.clf()
+            fig.set_size_inches(figsize)
+        else:
+            fig = plt.figure(figsize = figsize)
+            if name:
+                FIGURES[name] = fig
+        ax = fig.add_subplot()
+
+        keep = False
+        try:
+            yield fig, ax
+
+            if filename:
+                fig.savefig(filename, dpi = dpi) # saved before show(), a closed window may leave an empty canvas
+            if not BATCH:
+                plt.show()
+            keep = bool(name)
+        finally: # a plot that raised is closed too, even a named one, so failing plots never pile up
+            if not keep:
+                FIGURES.pop(name, None)
+                plt.close(fig)
+
+
+def close_all():
+    for fig in FIGURES.values():
+        plt.close(fig)
+    FIGURES.clear()
+
+
+def decimate(x, y, max_points = LINE_POINTS):
+    # keeps the minimum and the maximum of y in each of max_points/2 buckets, the drawn envelope stays the same
+    x, y = np.asarray(x), np.asarray(y)
+    if y.size <= max_points:
+        return x, y
+    buckets = max_points // 2
+    edges = np.linspace(0, y.size, buckets + 1).astype(np.int64)
+    lo = np.minimum.reduceat(np.where(np.isnan(y), np.inf, y), edges[:-1])
+    hi = np.maximum.reduceat(np.where(np.isnan(y), -np.inf, y), edges[:-1])
+    index = []
+    for start, end, low, high in zip(edges[:-1], edges[1:], lo, hi):
+        segment = y[start:end]
+        i, j = start + np.argmax(segment == low), start + np.argmax(segment == high)
+        index += sorted({i, j})
+    return x[index], y[index]
+
+
+def density_points(ax, x, y, label = None, marker = ',', bins = 300, threshold = DENSITY_THRESHOLD):
+    x, y = np.asarray(x), np.asarray(y)
+    if x.size <= threshold:
+        return ax.plot(x, y, label = label, marker = marker, linestyle = 'None')
+    hist, xedges, yedges = np.histogram2d(x, y, bins = bins)
+    mesh = ax.pcolormesh(xedges, yedges, np.ma.masked_equal(hist.T, 0), norm = LogNorm(), cmap = 'viridis', rasterized = True)
+    if label:
+        ax.plot([], [], marker = 's', linestyle = 'None', color = mesh.cmap(0.7), label = label) # pcolormesh has no legend entry
+    return mesh
+
+
+def simple_plot(xdata, ydata, labels, xlabel, ylabel, filename = None, kind = 'line', marker = ',', name = None): #function for plotting several datasets into the same image, x and ydata are expected to be lists of arrays. If only a single dataset is to be plotted, it must also be inside a list -> dataset = [dataset]
+    with figure(filename, name) as (fig, ax):
+        for x, y, l in zip(xdata, ydata, labels):
+            if kind == 'line':
+                ax.plot(*decimate(x, y), label = l)
+            elif kind == 'scatter' and len(x) <= DENSITY_THRESHOLD:
+                ax.scatter(x, y, label = l)
+            else:
+                density_points(ax, x, y, l, marker)
+
+        if any(l is not None for l in labels):
+            ax.legend()
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+
+
+def plot_histogram(hist, edges, lbl, xlabel, ylabel, line_pos = None, filename = None, name = None):
+    with figure(filename, name) as (fig, ax):
+        ax.stairs(hist, edges, label = lbl, fill = False, color = 'black')
+        if line_pos is not None:
+            ax.vlines(x = line_pos, ymin = 0, ymax = np.max(hist), color = 'red', label = f'Critical value at {np.round(line_pos, 2)}')
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        if lbl is not None or line_pos is not None:
+            ax.legend()
+
+
+def plot_histogram2d(hist, xedges, yedges, xlabel, ylabel, filename = None, name = None):
+    with figure(filename, name) as (fig, ax):
+        # histogram2d puts x in the first axis, imshow expects rows of y
+        hist_fig = ax.imshow(hist.T, origin = 'lower', aspect = 'auto', extent = [xedges[0], xedges[-1], yedges[0], yedges[-1]])
+        fig.colorbar(hist_fig)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
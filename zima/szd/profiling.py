@@ -0,0 +1,229 @@
+import argparse
+import contextlib
+import cProfile
+import functools
+import importlib.util
+import json
+import os
+import pathlib
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+
+# Timers and counters for the stages of the scripts in zima/.
+#   - "with stage('histogram'):" times a block, "@timed()" a function, "count('apples', n)" adds to a counter,
+#   - when profiling is off, stage() returns one shared empty context manager and timed()/count() only
+#     check a flag, so the instrumented code runs at its normal speed,
+#   - it is switched on by SZD_PROFILE=1 or by the flags from add_arguments() (see session()),
+#   - the report lists the calls, the total and the own time (without the nested stages) of every stage,
+#     the trace can be opened in chrome://tracing or https://ui.perfetto.dev.
+# The scripts whose code the docs show are not edited, this file can run them with their functions and
+# the slow library calls (random numbers, histograms, savefig) wrapped in stages:
+#   python szd/profiling.py --trace newton.json Newton/newton.py
+
+ENABLED = os.environ.get('SZD_PROFILE', '0') != '0'
+TOTALS = {} # name: [calls, total time, own time] in seconds
+COUNTERS = {}
+EVENTS = [] # complete events of the trace, (name, start, duration, thread) in nanoseconds
+MAX_EVENTS = 200000 # the totals are still counted beyond this, only the trace stops growing
+STACK = [] # time spent in nested stages of each open stage
+NULL = contextlib.nullcontext()
+START = time.perf_counter_ns()
+
+# library functions timed by instrument_libraries(): (module, attribute, stage name)
+LIBRARY_STAGES = [
+    ('numpy.random', 'normal', 'rng'),
+    ('numpy.random', 'uniform', 'rng'),
+    ('random', 'choice', 'rng'),
+    ('numpy', 'histogram', 'histogram'),
+    ('numpy', 'histogram2d', 'histogram'),
+    ('matplotlib.figure', 'Figure.savefig', 'savefig'),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Run a script from zima/ with its stages timed")
+    parser.add_argument("script", type = pathlib.Path)
+    parser.add_argument("arguments", nargs = argparse.REMAINDER, help = "arguments of the script")
+    add_arguments(parser)
+    args = parser.parse_args()
+    args.profile = True
+
+    module = load_script(args.script)
+    instrument(module)
+    instrument_libraries()
+    sys.argv = [str(args.script)] + args.arguments
+    with session_from_args(args):
+        with stage('main'):
+            module.main()
+
+
+def enable(enabled = True):
+    global ENABLED
+    ENABLED = enabled
+
+
+def reset():
+    global START
+    TOTALS.clear()
+    COUNTERS.clear()
+    EVENTS.clear()
+    START = time.perf_counter_ns()
+
+
+def stage(name):
+    return timed_block(name) if ENABLED else NULL
+
+
+@contextlib.contextmanager
+def timed_block(name):
+    STACK.append(0)
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter_ns() - start
+        nested = STACK.pop()
+        if STACK:
+            STACK[-1] += duration
+        record = TOTALS.setdefault(name, [0, 0.0, 0.0])
+        record[0] += 1
+        record[1] += duration * 1e-9
+        record[2] += (duration - nested) * 1e-9
+        if len(EVENTS) < MAX_EVENTS:
+            EVENTS.append((name, start - START, duration, threading.get_ident()))
+
+
+def timed(name = None):
+    def decorator(func):
+        label = name or func.__name__
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with timed_block(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, n = 1):
+    if ENABLED:
+        COUNTERS[name] = COUNTERS.get(name, 0) + n
+
+
+def report(file = None):
+    file = file or sys.stderr
+    if not TOTALS:
+        return
+    wall = (time.perf_counter_ns() - START) * 1e-9 # since the start of the session
+    print(f"{'stage':<30} {'calls':>9} {'total [s]':>10} {'own [s]':>10} {'own %':>6}  of {wall:.3f} s", file = file)
+    for name, (calls, total, own) in sorted(TOTALS.items(), key = lambda item: -item[1][2]):
+        print(f"{name:<30} {calls:>9} {total:>10.4f} {own:>10.4f} {100 * own / wall:>6.1f}", file = file)
+    for name, value in sorted(COUNTERS.items()):
+        print(f"{name:<30} {value:>9}", file = file)
+
+
+def write_trace(fName):
+    # Chrome trace-event format, times in microseconds
+    pid = os.getpid()
+    events = [{'name': name, 'ph': 'X', 'ts': start / 1e3, 'dur': duration / 1e3, 'pid': pid, 'tid': tid}
+              for name, start, duration, tid in EVENTS]
+    end = max((e['ts'] + e['dur'] for e in events), default = 0)
+    events += [{'name': name, 'ph': 'C', 'ts': end, 'pid': pid, 'args': {name: value}} for name, value in COUNTERS.items()]
+    with open(fName, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+@contextlib.contextmanager
+def session(trace = None, cprofile = None, memory = False, top = 15):
+    # profiling for the duration of the block, the report is printed at its end
+    enable()
+    reset()
+    profiler = cProfile.Profile() if cprofile else None
+    if memory:
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(cprofile)
+            pstats.Stats(profiler, stream = sys.stderr).sort_stats('cumulative').print_stats(top)
+        if memory:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"peak memory {peak / 2**20:.2f} MiB, largest allocations:", file = sys.stderr)
+            for s in snapshot.statistics('lineno')[:top]:
+                print(f"  {s}", file = sys.stderr)
+        report()
+        if trace:
+            write_trace(trace)
+            print(f"trace saved to {trace}", file = sys.stderr)
+        enable(False)
+
+
+def add_arguments(parser):
+    group = parser.add_argument_group("profiling")
+    group.add_argument("--profile", action = "store_true", default = ENABLED, help = "time the stages and print a report")
+    group.add_argument("--trace", default = os.environ.get('SZD_TRACE'), help = "save a Chrome trace-event JSON file")
+    group.add_argument("--cprofile", default = os.environ.get('SZD_CPROFILE'), help = "run cProfile and save the stats to this file")
+    group.add_argument("--tracemalloc", action = "store_true", default = os.environ.get('SZD_TRACEMALLOC', '0') != '0', help = "report the peak memory and the largest allocations")
+
+
+def session_from_args(args):
+    if not (args.profile or args.trace or args.cprofile or args.tracemalloc):
+        return NULL
+    return session(args.trace, args.cprofile, args.tracemalloc)
+
+
+def is_local(func):
+    # functions defined in zima/, but not in this package
+    code = getattr(func, '__code__', None)
+    if code is None:
+        return False
+    path = pathlib.Path(code.co_filename).resolve()
+    here = pathlib.Path(__file__).resolve().parent
+    return here.parent in path.parents and here not in path.parents
+
+
+def instrument(module):
+    # wraps the functions of a script (and the ones it imported from its neighbours) in stages, main() excluded
+    for name, value in list(vars(module).items()):
+        if name != 'main' and callable(value) and is_local(value):
+            setattr(module, name, timed(name)(value))
+
+
+def instrument_libraries(stages = LIBRARY_STAGES):
+    for module_name, attribute, name in stages:
+        try:
+            owner = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        *path, attribute = attribute.split('.')
+        for p in path:
+            owner = getattr(owner, p)
+        setattr(owner, attribute, timed(name)(getattr(owner, attribute)))
+
+
+def load_script(path):
+    # imports a script as a module, its "if __name__ == '__main__'" block does not run
+    path = pathlib.Path(path).resolve()
+    sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[path.stem] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+if __name__ == "__main__":
+    sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+    from szd.profiling import main # the scripts import szd.profiling, the stages must go to that module and not to __main__
+    main()